@@ -0,0 +1,107 @@
+# Copyright [2025] [Andrea Cuteri, Giuseppe Mazzotta and Francesco Ricca]
+
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+
+#        http://www.apache.org/licenses/LICENSE-2.0
+
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+
+#runs every workload with casper in a separate process (so that its peak memory can be measured) and
+#compares the results with the ones stored in a baseline
+class BenchmarkHarness:
+    RESULTS : dict = {10 : "SAT", 20 : "UNSAT", 30 : "SAT"}
+    STATISTICS_PREFIX : str = "{\"statistics\""
+    ROOT : Path = Path(__file__).resolve().parent.parent
+
+    command : list
+    casper_arguments : list
+    timeout : float
+    repetitions : int
+
+    def __init__(self, casper_arguments=[], timeout=60, repetitions=1, command=None):
+        self.command = [sys.executable, "-c", "from src.app import entrypoint; entrypoint()"] if command is None else command
+        self.casper_arguments = casper_arguments
+        self.timeout = timeout
+        self.repetitions = repetitions
+
+    #record of the workload - time is the median over the repetitions, the other values are the ones of the last run
+    def run_workload(self, program):
+        with tempfile.NamedTemporaryFile("w", suffix=".lp") as problem_file:
+            problem_file.write(program)
+            problem_file.flush()
+            records = [self.run_casper(problem_file.name) for _ in range(self.repetitions)]
+        record = records[-1]
+        if all("time" in run_record for run_record in records):
+            record["time"] = statistics.median(run_record["time"] for run_record in records)
+        return record
+
+    def run_casper(self, problem_path):
+        process = subprocess.Popen(self.command + ["--problem", problem_path, "--statistics", "--json", *self.casper_arguments], cwd=self.ROOT, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        timer = threading.Timer(self.timeout, process.kill)
+        timer.start()
+        try:
+            output = process.stdout.read()
+            #resource usage of this run only (getrusage would give the maximum over all the children of the harness)
+            (_, status, usage) = os.wait4(process.pid, 0)
+        finally:
+            timer.cancel()
+            process.stdout.close()
+        process.returncode = os.waitstatus_to_exitcode(status)
+        record = {"exit_code" : process.returncode, "result" : self.RESULTS.get(process.returncode, "ERROR"), "cpu" : usage.ru_utime + usage.ru_stime, "peak_rss_kb" : usage.ru_maxrss}
+        if process.returncode < 0:
+            record["result"] = "TIMEOUT"
+            return record
+        solver_statistics = None
+        for line in output.splitlines():
+            if line.startswith(self.STATISTICS_PREFIX):
+                solver_statistics = json.loads(line)["statistics"]
+        if solver_statistics is None:
+            record["result"] = "ERROR"
+            return record
+        record["time"] = solver_statistics["time"]["wall"]
+        record["iterations"] = solver_statistics["solvers_iterations"]
+        record["counterexamples"] = solver_statistics["counterexamples_found"]
+        if len(solver_statistics["iterations"]) > 0:
+            record["atoms"] = solver_statistics["iterations"][-1]["atoms"]
+            record["rules"] = solver_statistics["iterations"][-1]["rules"]
+        return record
+
+    def run(self, workloads):
+        for (name, program) in workloads:
+            yield (name, self.run_workload(program))
+
+    #differences with the baseline that are regressions - results must match, counters must not grow and
+    #time and memory must not grow more than tolerance (time differences below min_time are noise)
+    @staticmethod
+    def regressions(name, record, baseline, tolerance, min_time):
+        if not name in baseline:
+            return []
+        expected = baseline[name]
+        regressions = []
+        if record["result"] != expected["result"]:
+            regressions.append(f"result {record['result']} (baseline {expected['result']})")
+        if record["result"] in ["TIMEOUT", "ERROR"]:
+            return regressions
+        for counter in ["iterations", "counterexamples", "atoms", "rules"]:
+            if counter in expected and record.get(counter, 0) > expected[counter]:
+                regressions.append(f"{counter} {record.get(counter, 0)} (baseline {expected[counter]})")
+        if "time" in expected and record["time"] > expected["time"] * (1 + tolerance) and record["time"] - expected["time"] > min_time:
+            regressions.append(f"time {record['time']:.3f}s (baseline {expected['time']:.3f}s)")
+        if record["peak_rss_kb"] > expected["peak_rss_kb"] * (1 + tolerance):
+            regressions.append(f"peak rss {record['peak_rss_kb']}KB (baseline {expected['peak_rss_kb']}KB)")
+        return regressions
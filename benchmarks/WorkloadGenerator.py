@@ -0,0 +1,136 @@
+# Copyright [2025] [Andrea Cuteri, Giuseppe Mazzotta and Francesco Ricca]
+
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+
+#        http://www.apache.org/licenses/LICENSE-2.0
+
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+import random
+
+
+#parametric families of ASP(Q) programs covering every branch of the solver
+#programs of a family grow with the size parameter and are deterministic (random families use a seed derived from the size)
+class WorkloadGenerator:
+    #family -> default sizes
+    FAMILIES : dict = {
+        "exists_forall" : [20, 40, 80],
+        "forall_exists" : [20, 40, 80],
+        "three_levels" : [6, 9, 12],
+        "four_levels" : [4, 6, 8],
+        "local_weak" : [6, 9, 12],
+        "global_weak" : [6, 9, 12],
+    }
+
+    def generate(self, family, size):
+        if not family in self.FAMILIES:
+            raise Exception(f"Unknown workload family {family}")
+        return getattr(self, family)(size)
+
+    #every (family, size) of the default suite
+    def workloads(self, families=None):
+        for family in self.FAMILIES if families is None else families:
+            for size in self.FAMILIES[family]:
+                yield (f"{family}_{size}", self.generate(family, size))
+
+    #the countermove picks one item that must be in the guessed set, every counterexample adds one refinement (SAT)
+    def exists_forall(self, size):
+        return "\n".join([
+            "%@exists",
+            f"item(1..{size}).",
+            "{in(X) : item(X)}.",
+            "%@forall",
+            *self.pick_one("pick", "item(X)"),
+            "%@constraint",
+            ":- pick(X), not in(X).",
+        ])
+
+    #the universal player removes items until no item is left to the existential one (UNSAT)
+    def forall_exists(self, size):
+        return "\n".join([
+            "%@forall",
+            f"item(1..{size}).",
+            "{out(X) : item(X)}.",
+            "%@exists",
+            *self.pick_one("pick", "item(X)"),
+            "%@constraint",
+            ":- pick(X), out(X).",
+        ])
+
+    def three_levels(self, size):
+        return self.alternation(3, size)
+
+    def four_levels(self, size):
+        return self.alternation(4, size)
+
+    #P_2 picks one of the items with the lowest weight (weights repeat every three items)
+    #the guessed set must contain every item that might be picked
+    def local_weak(self, size):
+        return "\n".join([
+            "%@exists",
+            f"item(1..{size}).",
+            "{in(X) : item(X)}.",
+            "%@forall",
+            *self.pick_one("pick", "item(X)"),
+            ":~ pick(X). [X\\3@1,X]",
+            "%@constraint",
+            ":- pick(X), not in(X).",
+        ])
+
+    #minimum vertex cover of a cycle - the countermove picks an edge that must be covered
+    def global_weak(self, size):
+        return "\n".join([
+            "%@exists",
+            f"node(1..{size}).",
+            f"edge(X,X+1) :- node(X), X < {size}.",
+            f"edge({size},1).",
+            "{in(X) : node(X)}.",
+            "%@forall",
+            *self.pick_one("pick", "edge(X,Y)", "X,Y"),
+            "%@constraint",
+            ":- pick(X,Y), not in(X), not in(Y).",
+            "%@global",
+            ":~ in(X). [1@1,X]",
+        ])
+
+    #rules picking exactly one tuple of the domain without choice rules and aggregates (not supported after the first program)
+    def pick_one(self, predicate, domain, variables="X"):
+        other = ",".join(f"{variable}1" for variable in variables.split(","))
+        other_domain = domain.replace(f"({variables})", f"({other})")
+        return [
+            f"{predicate}({variables}) :- {domain}, not n{predicate}({variables}).",
+            f"n{predicate}({variables}) :- {domain}, not {predicate}({variables}).",
+            f":- {predicate}({variables}), {predicate}({other}), ({variables}) < ({other}).",
+            f"some_{predicate} :- {predicate}({variables}).",
+            f":- not some_{predicate}.",
+        ]
+
+    #random formula with the given number of quantifier alternations (starting with exists) and size atoms per level
+    def alternation(self, levels, size):
+        generator = random.Random(levels * 1000 + size)
+        atoms = []
+        program = []
+        for level in range(levels):
+            program.append("%@exists" if level % 2 == 0 else "%@forall")
+            names = [f"x{level}_{i}" for i in range(size)]
+            if level == 0:
+                program.append("{" + ";".join(names) + "}.")
+            else:
+                outer_atoms = [atom for level_atoms in atoms for atom in level_atoms]
+                for name in names:
+                    body = ""
+                    if generator.random() < 0.3:
+                        body = ", " + ("not " if generator.random() < 0.5 else "") + generator.choice(outer_atoms)
+                    program.append(f"{name} :- not n{name}{body}. n{name} :- not {name}.")
+            atoms.append(names)
+        program.append("%@constraint")
+        all_atoms = [atom for level_atoms in atoms for atom in level_atoms]
+        for _ in range(2 * size):
+            literals = generator.sample(all_atoms, 3)
+            program.append(":- " + ", ".join(("not " if generator.random() < 0.5 else "") + atom for atom in literals) + ".")
+        return "\n".join(program)
@@ -0,0 +1,78 @@
+# Copyright [2025] [Andrea Cuteri, Giuseppe Mazzotta and Francesco Ricca]
+
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+
+#        http://www.apache.org/licenses/LICENSE-2.0
+
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+import argparse
+import json
+import shlex
+from pathlib import Path
+
+from .BenchmarkHarness import BenchmarkHarness
+from .WorkloadGenerator import WorkloadGenerator
+
+
+def main():
+    parser = argparse.ArgumentParser(prog = "python -m benchmarks", description = "Run the Casper benchmark suite and compare it with a baseline\n")
+    parser.add_argument('--baseline', help="path to the baseline file\n", required=False, default=str(Path(__file__).resolve().parent / "baseline.json"))
+    parser.add_argument('--save', help="store the results as the new baseline instead of comparing them\n", required=False, action="store_true")
+    parser.add_argument('--families', help="comma separated workload families (default is all of them)\n", required=False, default="")
+    parser.add_argument('--sizes', help="comma separated sizes replacing the default sizes of every family\n", required=False, default="")
+    parser.add_argument('--casper-arguments', help="further arguments given to casper (e.g. --casper-arguments=\"--ground-refinement\")\n", required=False, default="")
+    parser.add_argument('--timeout', help="timeout in seconds of every run\n", required=False, default=60)
+    parser.add_argument('--repetitions', help="runs of every workload (time is the median)\n", required=False, default=1)
+    parser.add_argument('--tolerance', help="relative growth of time and peak rss reported as regression\n", required=False, default=0.2)
+    parser.add_argument('--min-time', help="time differences (in seconds) below this value are never reported\n", required=False, default=0.1)
+    args = parser.parse_args()
+
+    generator = WorkloadGenerator()
+    families = list(WorkloadGenerator.FAMILIES) if args.families == "" else args.families.split(",")
+    for family in families:
+        if not family in WorkloadGenerator.FAMILIES:
+            parser.error(f"unknown workload family {family}")
+    if args.sizes != "":
+        workloads = [(f"{family}_{size}", generator.generate(family, int(size))) for family in families for size in args.sizes.split(",")]
+    else:
+        workloads = generator.workloads(families)
+
+    baseline = dict()
+    if not args.save and Path(args.baseline).exists():
+        baseline = json.load(open(args.baseline))
+
+    harness = BenchmarkHarness(shlex.split(args.casper_arguments), float(args.timeout), int(args.repetitions))
+    results = dict()
+    regressions = 0
+    for (name, record) in harness.run(workloads):
+        results[name] = record
+        line = f"{name:<20} {record['result']:<8}"
+        if "time" in record:
+            line += f" time {record['time']:.3f}s iterations {record['iterations']}"
+        line += f" peak rss {record['peak_rss_kb']}KB"
+        if "rules" in record:
+            line += f" ground {record['atoms']} atoms {record['rules']} rules"
+        print(line, flush=True)
+        for regression in BenchmarkHarness.regressions(name, record, baseline, float(args.tolerance), float(args.min_time)):
+            print(f"  REGRESSION {regression}", flush=True)
+            regressions += 1
+
+    if args.save:
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+        print(f"Baseline stored in {args.baseline}")
+        return 0
+    if len(baseline) == 0:
+        print("No baseline to compare with (use --save to store one)")
+        return 0
+    print(f"{regressions} regressions")
+    return 1 if regressions > 0 else 0
+
+if __name__ == "__main__":
+    exit(main())
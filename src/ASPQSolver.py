@@ -13,28 +13,35 @@
 #    limitations under the License.
 from pathlib import Path
 import clingo
+import concurrent.futures
 from clingo.ast import parse_string
 
 from .ASPChefModelPrinter import ASPChefModelPrinter
+from .ActivationRewriter import ActivationRewriter
 from .ClingoLogger import ClingoLogger
 from .CostRewriter import CostRewriter
 from .RefinementGlobalWeakRewriter import RefinementGlobalWeakRewriter
+from .GlobalWeakSearch import GlobalWeakSearch
 from .WeakObserver import WeakObserver
 from .OrProgramRewriter import OrProgramRewriter
 from .RefinementWeakRewriter import RefinementWeakRewriter
 from .RelaxedRewriter import RelaxedRewriter
 from .SolverStatistics import SolverStatistics
+from .CegarTrace import CegarTrace
 
 from .CounterexampleRewriter import CounterexampleRewriter
+from .GroundRefinementRewriter import GroundRefinementRewriter
 from .RefinementRewriter import RefinementRewriter
 from .RefinementNoWeakRewriter import RefinementNoWeakRewriter
 from .SolverSettings import SolverSettings
 from .QuantifiedProgram import ProgramQuantifier
 from .ConstraintModelPrinter import ConstraintModelPrinter
 from .ModelPrinter import ModelPrinter
+from .NdjsonModelPrinter import NdjsonModelPrinter
 from .MyLogger import MyLogger
 from .PositiveModelPrinter import PositiveModelPrinter
 from .ProgramsHandler import ProgramsHandler
+from .ProjectionIndex import ProjectionIndex
 from .QuantifiedProgram import QuantifiedProgram
 
 class ASPQSolver:
@@ -45,22 +52,21 @@ class ASPQSolver:
     ctl_countermove : clingo.Control
     ctl_countermove_has_weak : bool
     ctl_countermove_weak_observer : WeakObserver
+    #cost of the last optimal model of ctl countermove - initial bound of the next counterexample search with warm start
+    countermove_bound : list
     assumptions : list
-    symbols_defined_in_first_program : dict
-    output_symbols_defined_in_first_program : dict
+    first_program_index : ProjectionIndex
 
     current_candidate : clingo.solving._SymbolSequence
-    current_candidate_symbols_set : set
     current_counterexample : clingo.solving._SymbolSequence
     current_candidate_cost : list
     current_counterexample_cost : list
-    current_counterexample_symbols_set : set
     last_quantified_model : clingo.solving._SymbolSequence
     last_quantified_model_cost : list
     
     refinement_global_weak_rewriter : RefinementGlobalWeakRewriter
+    global_weak_search : GlobalWeakSearch
     refinement_rewriter : RefinementRewriter
-    counterexample_rewriter: CounterexampleRewriter
     models_found : int
     exists_first: bool
     model_printer : ModelPrinter
@@ -84,6 +90,38 @@ class ASPQSolver:
     violated_global_bound_found : bool
     unsat_c_predicate_found : bool
     clingo_logger : ClingoLogger
+    ground_refinement : bool
+    grounded : bool
+    external_choice_str : str
+    grounded_extensions : int
+    #first program of the refinement solver extended after the solver was built (refinements and model constraints)
+    first_program_extensions : list
+    #each extension is checked for counterexamples by its own solver and refined by its own rewriter
+    extension_counterexample_solvers : list
+    extension_refinement_rewriters : list
+    added_templates : set
+    #record of the current iteration of the cegar loop (None when not tracing)
+    trace_record : dict
+    trace_iterations : int
+    #(wall time of every phase, control receiving refinements, number of its atoms) when the iteration started
+    trace_start : tuple
+    #ctl countermove and its copies checking the candidates of a speculative batch, with the literals of P_1 in every copy
+    countermove_controls : list
+    countermove_controls_literals : list
+    #(truth values of the atoms of P_1, symbols) of the candidates of the current speculative batch
+    speculative_candidates : list
+    #literals of P_1 already projected on in ctl move
+    projected_literals : int
+    #program refined (P_2 of 2-ASP(Q) programs) -> projections on its atoms of the counterexamples already refined
+    refined_counterexamples : dict
+    #refinements guarded by an activation external that can be retired:
+    #iteration -> [activation atom, literal of the fail atom (None if it is never derived), counterexample key, last candidate the refinement was relevant for]
+    live_refinements : dict
+    candidates_checked : int
+    #keys of the counterexamples retired once - their new refinements are never retired (so that the loop terminates)
+    retired_counterexamples : set
+    #control -> literal of an atom without rules (always false) used to assume atoms that are not in its domain
+    false_literals : dict
 
     def __init__(self, programs_handler, solver_settings, main_solver, depth):
         self.programs_handler = programs_handler
@@ -93,24 +131,27 @@ class ASPQSolver:
         self.settings = solver_settings
         #sub solvers are always required to compute one model, inherit the same debug flag as the parent,
         #never print the model as a constraint since no enumeration is needed, apply ground transformations iff the current solver does
-        self.sub_solvers_settings = SolverSettings(1, self.settings.debug, False, self.settings.ground_transformation, self.settings.no_weak, self.settings.collapse_global_weak, self.settings.json_format)
+        self.sub_solvers_settings = SolverSettings(1, self.settings.debug, False, self.settings.ground_transformation, self.settings.no_weak, self.settings.collapse_global_weak, self.settings.json_format, self.settings.ground_refinement, self.settings.move_search, self.settings.countermove_search, self.settings.ndjson_format, self.settings.model_output, self.settings.speculative_candidates, self.settings.refinement_lifetime, self.settings.global_weak_strategy, self.settings.countermove_warm_start)
         self.program_levels = len(self.programs_handler.programs_list) -1
         self.assumptions = []
-        self.counterexample_rewriter = None
         self.refinement_rewriter = None
         self.models_found = 0
         if self.settings.constraint_print:
-            self.model_printer = ConstraintModelPrinter()
+            self.model_printer = ConstraintModelPrinter(self.settings.model_output)
+        elif self.settings.ndjson_format:
+            self.model_printer = NdjsonModelPrinter(self.settings.model_output)
         elif self.settings.json_format:
-            self.model_printer = ASPChefModelPrinter()
+            self.model_printer = ASPChefModelPrinter(self.settings.model_output)
         else:
-            self.model_printer = PositiveModelPrinter()
+            self.model_printer = PositiveModelPrinter(self.settings.model_output)
 
         self.exists_first = self.programs_handler.exists_first()
         self.main_solver = main_solver
         self.refinement_global_weak_rewriter = None
+        self.global_weak_search = None
         if not self.programs_handler.global_weak_program is None:
             self.refinement_global_weak_rewriter = RefinementGlobalWeakRewriter(self.programs_handler.global_weak_program)
+            self.global_weak_search = GlobalWeakSearch(self.settings.global_weak_strategy, self.refinement_global_weak_rewriter)
         if self.program_levels > 2:
             #define counterexample and refinement solvers
             self.counterexample_solver = None
@@ -120,11 +161,8 @@ class ASPQSolver:
         self.current_counterexample = None
         self.current_candidate_cost = []
         self.current_counterexample_cost = []
-        self.current_candidate_symbols_set = set()
-        self.current_counterexample_symbols_set = set()
 
-        self.symbols_defined_in_first_program = dict()
-        self.output_symbols_defined_in_first_program = dict()
+        self.first_program_index = ProjectionIndex()
         self.last_quantified_model_cost = None
         self.last_quantified_model = None
         self.p1_predicates_are_output = len(self.programs_handler.p(0).output_predicates) == 0
@@ -140,12 +178,37 @@ class ASPQSolver:
         self.violated_constraint_found = False
         self.violated_global_bound_found = False
         self.ctl_countermove_has_weak = False
+        self.ctl_countermove = None
+        self.countermove_bound = []
         self.unsat_c_predicate_found = False
         self.clingo_logger = ClingoLogger()
+        self.ground_refinement = False
+        self.grounded = False
+        self.external_choice_str = ""
+        self.grounded_extensions = 0
+        self.first_program_extensions = []
+        self.extension_counterexample_solvers = []
+        self.extension_refinement_rewriters = []
+        self.added_templates = set()
+        self.trace_record = None
+        self.trace_iterations = 0
+        self.trace_start = None
+        self.countermove_controls = []
+        self.countermove_controls_literals = []
+        self.speculative_candidates = []
+        self.projected_literals = 0
+        self.refined_counterexamples = dict()
+        self.live_refinements = dict()
+        self.candidates_checked = 0
+        self.retired_counterexamples = set()
+        self.false_literals = dict()
 
     def ground_and_construct_choice_interfaces(self):
         choice = []
-        self.ctl_move = clingo.Control(logger=self.clingo_logger.log) 
+        self.ctl_move = clingo.Control(self.settings.move_search.arguments(), logger=self.clingo_logger.log) 
+        #quantified answer sets are enumerated by blocking them and solving again, so one optimal candidate is needed per
+        #solve call - optN is kept since the termination test of weak refinements reads the atoms of the model proven optimal
+        #and in opt mode the last model reported is just the first one found with the optimal cost (see on_candidate)
         self.ctl_move.configuration.solve.opt_mode = "optN"
         self.ctl_move.configuration.solve.models = "0"
 
@@ -182,15 +245,11 @@ class ASPQSolver:
                 if not self.programs_handler.p(0).contains_weak():
                     self.settings.logger.debug(f"%sAdded flipped constraint program to ctl move:\n%s", self.output_pad, self.programs_handler.neg_c().rules)
                     self.ctl_move.add(self.programs_handler.neg_c().rules)
-            self.ctl_move.ground()
+            with SolverStatistics().phase(SolverStatistics.GROUND_MOVE):
+                self.ctl_move.ground()
             for atom in self.ctl_move.symbolic_atoms:
                 if atom.symbol.name in self.programs_handler.p(0).head_predicates:
-                    self.symbols_defined_in_first_program[atom.symbol] = None
-                    if not self.p1_predicates_are_output and atom.symbol.name in self.programs_handler.p(0).output_predicates:
-                        self.output_symbols_defined_in_first_program[atom.symbol] = None
-            
-            if self.p1_predicates_are_output:
-                self.output_symbols_defined_in_first_program = self.symbols_defined_in_first_program
+                    self.first_program_index.add(atom.symbol, atom.literal, self.p1_predicates_are_output or atom.symbol.name in self.programs_handler.p(0).output_predicates)
             self.settings.logger.debug("%sGrounded ctl move", self.output_pad)
             return
         else:
@@ -204,14 +263,13 @@ class ASPQSolver:
                 self.ctl_move.add(cost_global_constraint_rewriter.rewritten_program)
                 self.settings.logger.debug("%sAdded cost program for global weak to ctl move:\n%s", self.output_pad, cost_global_constraint_rewriter.rewritten_program)
             
-            self.ctl_move.ground()
+            with SolverStatistics().phase(SolverStatistics.GROUND_MOVE):
+                self.ctl_move.ground()
             choice = []
             disjoint = True
             for atom in self.ctl_move.symbolic_atoms:
                 if atom.symbol.name in self.programs_handler.p(0).head_predicates:
-                    self.symbols_defined_in_first_program[atom.symbol] = None
-                    if not self.p1_predicates_are_output and atom.symbol.name in self.programs_handler.p(0).output_predicates:
-                        self.output_symbols_defined_in_first_program[atom.symbol] = None
+                    self.first_program_index.add(atom.symbol, atom.literal, self.p1_predicates_are_output or atom.symbol.name in self.programs_handler.p(0).output_predicates)
                     choice.append(str(atom.symbol))
                     disjoint = False
     
@@ -219,8 +277,6 @@ class ASPQSolver:
             if not self.programs_handler.global_weak_program is None:
                 self.refinement_global_weak_rewriter.compute_placeholder_program(self.ctl_move.symbolic_atoms)
 
-            if self.p1_predicates_are_output:
-                self.output_symbols_defined_in_first_program = self.symbols_defined_in_first_program
             #add choice in the next program
             if not disjoint:
                 if len(choice) > 0:
@@ -236,8 +292,9 @@ class ASPQSolver:
                 ctl_weak = clingo.Control(logger=self.clingo_logger.log)
                 cost_p2_rewriter = CostRewriter(self.programs_handler.p(1),SolverSettings.WEAK_VIOLATION_ATOM_NAME, SolverSettings.LEVEL_COST_ATOM_NAME, SolverSettings.COST_AT_LEVEL_ATOM_NAME, True, False)
                 cost_p2_rewriter.rewrite()
-                ctl_weak.add(self.choice_str + self.programs_handler.p(1).rules + cost_p2_rewriter.rewritten_program_with_aggregate())
-                ctl_weak.ground()
+                ctl_weak.add(self.choice_str + self.programs_handler.instance + self.programs_handler.p(1).rules + cost_p2_rewriter.rewritten_program_with_aggregate())
+                with SolverStatistics().phase(SolverStatistics.GROUND_COUNTERMOVE):
+                    ctl_weak.ground()
                 level_facts = []
                 for atom in ctl_weak.symbolic_atoms:
                     if atom.symbol.name == SolverSettings.WEAK_VIOLATION_ATOM_NAME:
@@ -245,61 +302,87 @@ class ASPQSolver:
                 level_facts_str = "\n".join(level_facts)
                 self.settings.logger.debug("%sAdded weak levels to ctl move %s", self.output_pad, level_facts_str)
                 self.ctl_move.add("levels", [], level_facts_str)
-                self.ctl_move.ground([("levels", [])])
+                with SolverStatistics().phase(SolverStatistics.GROUND_MOVE):
+                    self.ctl_move.ground([("levels", [])])
                 
 
             if self.program_levels == 2:
-                self.ctl_countermove = clingo.Control(logger=self.clingo_logger.log)
-                self.ctl_countermove.configuration.solve.opt_mode = "optN"
-                self.ctl_countermove.configuration.solve.models = "0"
-                self.settings.logger.debug("%sadded choice to ctl countermove:\n%s", self.output_pad, self.choice_str)
-                self.ctl_countermove.add(self.choice_str)
-                self.ctl_countermove.add(self.programs_handler.p(1).rules)
-                self.settings.logger.debug("%sadded second program to ctl countermove:\n%s", self.output_pad, self.programs_handler.p(1).rules)
-                if not self.programs_handler.p(1).contains_weak():
-                    if self.programs_handler.last_exists():
-                        self.ctl_countermove.add(self.programs_handler.c().rules)
-                        self.settings.logger.debug("%sadded constraint to ctl countermove:\n%s", self.output_pad, self.programs_handler.c().rules)
-                    else:
-                        self.settings.logger.debug("%sadded flipped constraint to ctl countermove:\n%s", self.output_pad, self.programs_handler.neg_c().rules)
-                        self.ctl_countermove.add(self.programs_handler.neg_c().rules)
-                #second program contains weak which were not rewritten
-                else:
-                    weak_repr = "\n".join(str(weak) for weak in self.programs_handler.p(1).weak_constraints)
-                    self.ctl_countermove.add(weak_repr)
-                    self.ctl_countermove_has_weak = True
-                    self.settings.logger.debug("%sadded weak to ctl countermove:\n%s", self.output_pad, weak_repr)
-                    self.relaxed_rewriter = RelaxedRewriter(SolverSettings.WEAK_NO_MODEL_LEVEL, SolverSettings.UNSAT_C_PREDICATE)
-
-                    if self.programs_handler.exists_first():
-                        parse_string(self.programs_handler.neg_c().rules, lambda stm: (self.relaxed_rewriter(stm)))
-                    else:
-                        parse_string(self.programs_handler.c().rules, lambda stm: (self.relaxed_rewriter(stm)))
-                    relaxed_constraint = "\n".join(self.relaxed_rewriter.program)
-                    self.settings.logger.debug("%sadded relaxed constraint to ctl countermove:\n%s", self.output_pad, relaxed_constraint)
-                    self.ctl_countermove.add(relaxed_constraint)
-                    self.ctl_countermove_weak_observer = WeakObserver()
-                    self.ctl_countermove.register_observer(self.ctl_countermove_weak_observer)
+                self.ctl_countermove = self.countermove_control()
+                #copies checking the other candidates of a speculative batch (literals of P_1 are resolved in every copy)
+                self.countermove_controls = [self.ctl_countermove] + [self.countermove_control() for _ in range(1, self.speculative_batch_size())]
+                self.countermove_controls_literals = [self.first_program_index.countermove_literals] + [[] for _ in range(1, len(self.countermove_controls))]
 
-                self.ctl_countermove.ground()
+    #grounded control with the choice over P_1, P_2 and C (or its relaxation when P_2 contains weak constraints)
+    def countermove_control(self):
+        ctl_countermove = clingo.Control(self.settings.countermove_search.arguments(), logger=self.clingo_logger.log)
+        ctl_countermove.configuration.solve.opt_mode = "optN"
+        ctl_countermove.configuration.solve.models = "0"
+        self.settings.logger.debug("%sadded choice to ctl countermove:\n%s", self.output_pad, self.choice_str)
+        ctl_countermove.add(self.choice_str)
+        #the instance is replicated in every subprogram
+        if self.programs_handler.instance != "":
+            ctl_countermove.add(self.programs_handler.instance)
+        ctl_countermove.add(self.programs_handler.p(1).rules)
+        self.settings.logger.debug("%sadded second program to ctl countermove:\n%s", self.output_pad, self.programs_handler.p(1).rules)
+        if not self.programs_handler.p(1).contains_weak():
+            if self.programs_handler.last_exists():
+                ctl_countermove.add(self.programs_handler.c().rules)
+                self.settings.logger.debug("%sadded constraint to ctl countermove:\n%s", self.output_pad, self.programs_handler.c().rules)
+            else:
+                self.settings.logger.debug("%sadded flipped constraint to ctl countermove:\n%s", self.output_pad, self.programs_handler.neg_c().rules)
+                ctl_countermove.add(self.programs_handler.neg_c().rules)
+        #second program contains weak which were not rewritten
+        else:
+            weak_repr = "\n".join(str(weak) for weak in self.programs_handler.p(1).weak_constraints)
+            ctl_countermove.add(weak_repr)
+            self.ctl_countermove_has_weak = True
+            self.settings.logger.debug("%sadded weak to ctl countermove:\n%s", self.output_pad, weak_repr)
+            self.relaxed_rewriter = RelaxedRewriter(SolverSettings.WEAK_NO_MODEL_LEVEL, SolverSettings.UNSAT_C_PREDICATE)
+
+            if self.programs_handler.exists_first():
+                parse_string(self.programs_handler.neg_c().rules, lambda stm: (self.relaxed_rewriter(stm)))
+            else:
+                parse_string(self.programs_handler.c().rules, lambda stm: (self.relaxed_rewriter(stm)))
+            relaxed_constraint = "\n".join(self.relaxed_rewriter.program)
+            self.settings.logger.debug("%sadded relaxed constraint to ctl countermove:\n%s", self.output_pad, relaxed_constraint)
+            ctl_countermove.add(relaxed_constraint)
+            self.ctl_countermove_weak_observer = WeakObserver()
+            ctl_countermove.register_observer(self.ctl_countermove_weak_observer)
 
+        with SolverStatistics().phase(SolverStatistics.GROUND_COUNTERMOVE):
+            ctl_countermove.ground()
+            #refinements read counterexamples only through the atoms of P_2, so counterexamples are projected on them by clingo
+            if not self.programs_handler.p(1).contains_weak():
+                shown = [f"#show {'' if positive else '-'}{name}/{arity}." for (name, arity, positive) in ctl_countermove.symbolic_atoms.signatures if name in self.programs_handler.p(1).head_predicates]
+                self.settings.logger.debug("%sCounterexamples of ctl countermove projected on:\n%s", self.output_pad, " ".join(shown))
+                ctl_countermove.add("counterexample_projection", [], "#show.\n" + "\n".join(shown))
+                ctl_countermove.ground([("counterexample_projection", [])])
+        return ctl_countermove
+
+    #with weak constraints only the model proven optimal is materialized (intermediate models just improve the bound)
+    #and the search stops at the first one
     def on_candidate(self, model):
+        if self.ctl_move_has_weak and len(model.cost) > 0 and not model.optimality_proven:
+            return True
         self.current_candidate_cost = model.cost
         self.current_candidate = model.symbols(shown=True)
+        self.first_program_index.set_model(model)
+        if len(self.live_refinements) > 0:
+            self.mark_relevant_refinements(model)
         if not self.programs_handler.global_weak_program is None:
             self.violated_global_bound_found = any(model.contains(atom) for atom in self.violated_global_weak_atoms)
         if self.ctl_move_has_weak:    
             #check if all fail dominated and violated_constraint are in model
-            if model.optimality_proven:
-                if self.program_levels == 1:
-                    self.unsat_c_predicate_found = model.contains(self.unsat_c_atom)
-                self.fail_found = any(model.contains(fail_atom) for fail_atom in self.fail_atoms)
-                self.dominated_found = any(model.contains(dominated_atom) for dominated_atom in self.dominated_atoms)
-                self.violated_constraint_found = any(model.contains(violated_constraint_atom) for violated_constraint_atom in self.violated_constraint_atoms)
-            return not model.optimality_proven
+            if self.program_levels == 1:
+                self.unsat_c_predicate_found = model.contains(self.unsat_c_atom)
+            self.fail_found = any(model.contains(fail_atom) for fail_atom in self.fail_atoms)
+            self.dominated_found = any(model.contains(dominated_atom) for dominated_atom in self.dominated_atoms)
+            self.violated_constraint_found = any(model.contains(violated_constraint_atom) for violated_constraint_atom in self.violated_constraint_atoms)
         return False
         
     def on_counterexample(self, model):
+        if self.ctl_countermove_has_weak and len(model.cost) > 0 and not model.optimality_proven:
+            return True
         self.current_counterexample_cost = model.cost
         self.current_counterexample = model.symbols(shown=True)
         if self.ctl_countermove_has_weak:           
@@ -308,73 +391,67 @@ class ASPQSolver:
             return not model.optimality_proven 
         return False
 
-    def finished_search_for_candiate(self, result):
-        if not result.unsatisfiable:
-            self.current_candidate_symbols_set.clear()
-            for symbol in self.current_candidate:
-                self.current_candidate_symbols_set.add(symbol)
-
-    def finished_search_for_counterexample(self, result):
-        if not result.unsatisfiable:
-            self.current_counterexample_symbols_set.clear()
-            for symbol in self.current_counterexample:
-                self.current_counterexample_symbols_set.add(symbol)
-
-
-    #add quantified answer set as constraint for enabling enumeration        
+    #add quantified answer set as constraint for enabling enumeration
+    #the projection of the model on the output symbols is added to ctl move as a nogood through the backend (no grounding)
     def add_model_as_constraint(self):
-        constraint = ":-"
-        for symbol in self.output_symbols_defined_in_first_program.keys():
-            if symbol in self.current_candidate_symbols_set:
-                constraint += f"{symbol},"
-            else:
-                constraint += f"not {symbol},"
-
-        constraint = constraint[:-1]
-        constraint += "."
-        self.settings.logger.debug("%sAdding model as constraint to ctl move:\n%s", self.output_pad, constraint)
-        self.ctl_move.add(f"constraint_{self.models_found}", [], constraint)
-        self.ctl_move.ground([(f"constraint_{self.models_found}", [])])
+        nogood = self.first_program_index.blocking_nogood()
+        self.settings.logger.debug("%sAdding model as nogood to ctl move: %s", self.output_pad, nogood)
+        with SolverStatistics().phase(SolverStatistics.GROUND_MOVE):
+            with self.ctl_move.backend() as backend:
+                backend.add_rule([], nogood)
+        #candidates are computed by the refinement solver once it exists
+        if self.program_levels > 2:
+            constraint = self.first_program_index.blocking_constraint()
+            self.first_program_extensions.append(constraint)
+            if not self.refinement_solver is None:
+                self.refinement_solver.extend_programs(self.first_program_extension(constraint, self.refinement_solver))
 
     def print_projected_model(self, model):
         if self.settings.collapse_global_weak:
             print(self.current_candidate_cost)
-        self.model_printer.print_model(model, self.output_symbols_defined_in_first_program)
+        self.model_printer.print_model(model, self.first_program_index.output_positions)
         if self.settings.collapse_global_weak:
             print("OPTIMUM FOUND")
 
     #solve function for ASPQ with n levels
     def solve_n_levels(self, external_assumptions, choice_str):
         SolverStatistics().iteration_done()
-        self.choice_str = choice_str
         self.external_assumptions = external_assumptions
 
-        self.ground_and_construct_choice_interfaces()
+        #sub solvers are grounded once, subsequent calls only solve under the new assumptions
+        if not self.grounded:
+            self.choice_str = choice_str
+            self.external_choice_str = choice_str
+            self.ground_and_construct_choice_interfaces()
+            self.grounded = True
+        else:
+            self.models_found = 0
+
+        if self.projective_enumeration():
+            return self.enumerate_projected_models()
 
         while self.models_found < self.settings.n_models or self.settings.enumeration:
             satisfiable = self.recursive_cegar()
             if satisfiable:
                 if self.exists_first:
                     if not self.programs_handler.global_weak_program is None:
-                        current_upper_bound, cost_print = self.refinement_global_weak_rewriter.compute_cost_and_new_upper_bound(self.current_candidate_symbols_set)
-                        self.violated_global_weak_atoms.append(clingo.Function(self.refinement_global_weak_rewriter.current_violated_bound_atom_name , []))
                         self.ctl_move_has_weak = True
-                        self.settings.logger.debug("%sCurrent upper bound: %s", self.output_pad, current_upper_bound)
-                        #last model is optimum
-                        #TODO put the cost equal to 2 when enumeration is enabled
+                        #the probed bound cannot be improved
                         if self.violated_global_bound_found:
-                            if not self.programs_handler.global_weak_program is None:
-                                print("OPTIMUM FOUND")
-                                self.optimum_found = True
-                                self.print_projected_model(self.last_quantified_model)
-                            self.models_found += 1
-                            return True # enumeration of optimal models not supported yet
-                        else:
-                            print(f"OPTIMIZATION: {cost_print}")
-                            #add constraint with new bound                                    
-                            self.settings.logger.debug("%sAdding cost constraint to ctl move %s", self.output_pad, current_upper_bound)
-                            self.ctl_move.add(f"optimization_{self.refinement_global_weak_rewriter.iteration}", [], current_upper_bound)
-                            self.ctl_move.ground([(f"optimization_{self.refinement_global_weak_rewriter.iteration}", [])])
+                            if self.next_global_weak_probe(False):
+                                return True
+                            continue
+                        current_upper_bound, cost_print = self.refinement_global_weak_rewriter.compute_cost_and_new_upper_bound(set(self.current_candidate))
+                        self.settings.logger.debug("%sCurrent upper bound: %s", self.output_pad, current_upper_bound)
+                        self.global_weak_search.improved(current_upper_bound, self.refinement_global_weak_rewriter.current_violations)
+                        print(f"OPTIMIZATION: {cost_print}")
+                        #the bound constraint is grounded once, then every probed bound only changes its externals
+                        if len(self.violated_global_weak_atoms) == 0:
+                            self.settings.logger.debug("%sAdding cost constraint to ctl move %s", self.output_pad, self.refinement_global_weak_rewriter.bound_program)
+                            self.ctl_move.add("optimization", [], self.refinement_global_weak_rewriter.bound_program)
+                            with SolverStatistics().phase(SolverStatistics.GROUND_MOVE):
+                                self.ctl_move.ground([("optimization", [])])
+                            self.violated_global_weak_atoms.append(clingo.Function(self.refinement_global_weak_rewriter.current_violated_bound_atom_name, []))
                     else:
                         self.models_found += 1
                     if self.main_solver:
@@ -383,12 +460,15 @@ class ASPQSolver:
                         self.last_quantified_model_cost = self.current_candidate_cost
                         self.last_quantified_model = self.current_candidate
                         self.current_candidate_cost = []
-                        #empty model is unique if it exists - no other models can be
-                        if len(self.current_candidate) == 0:
+                        #without output symbols every model has the same (empty) projection
+                        if len(self.first_program_index.output_positions) == 0:
                             return True
                     if self.models_found == self.settings.n_models:
                         return True
                     self.add_model_as_constraint()
+                    if not self.programs_handler.global_weak_program is None:
+                        if self.next_global_weak_probe(True):
+                            return True
                 else:
                     if self.main_solver:
                         SolverStatistics().model_found()
@@ -399,11 +479,11 @@ class ASPQSolver:
                 if not self.exists_first:
                     return False
                                 
+                #no model with a cost lower than the probed bound
                 if self.exists_first and  not self.programs_handler.global_weak_program is None and not self.last_quantified_model is None:
-                    print("OPTIMUM FOUND")
-                    self.optimum_found = True
-                    self.print_projected_model(self.last_quantified_model)
-                    return True
+                    if self.next_global_weak_probe(False):
+                        return True
+                    continue
                 #program starts with exists and therefore there might be models already found
                 #the exit code should depend also on these
                 if self.models_found > 0:
@@ -411,10 +491,211 @@ class ASPQSolver:
                 else:
                     return False
 
+    #moves to the bound probed next by the optimization of global weak constraints, after a probe that either improved
+    #the upper bound or found no model - returns True if the last quantified answer set is proven optimum
+    def next_global_weak_probe(self, improved):
+        if not improved:
+            self.global_weak_search.failed()
+        bound = self.global_weak_search.next_bound()
+        if bound is None:
+            print("OPTIMUM FOUND")
+            self.optimum_found = True
+            self.print_projected_model(self.last_quantified_model)
+            self.models_found += 1
+            return True
+        self.settings.logger.debug("%sProbing global weak bound %s", self.output_pad, bound)
+        for (external, value) in self.refinement_global_weak_rewriter.bound_assignment(bound):
+            self.ctl_move.assign_external(external, value)
+        return False
+
+    #quantified answer sets of \exists P_1 : C (without weak constraints) are its answer sets projected on the output symbols
+    #in this case they are enumerated by clingo within a single solve call
+    def projective_enumeration(self):
+        if not self.main_solver or self.program_levels != 1 or not self.programs_handler.last_exists():
+            return False
+        if self.programs_handler.p(0).contains_weak() or not self.programs_handler.global_weak_program is None:
+            return False
+        return (self.settings.enumeration or self.settings.n_models > 1) and len(self.first_program_index.output_positions) > 0
+
+    def enumerate_projected_models(self):
+        with self.ctl_move.backend() as backend:
+            backend.add_project(self.first_program_index.output_literals())
+        self.ctl_move.configuration.solve.project = "project"
+        self.ctl_move.configuration.solve.models = str(self.settings.n_models)
+        with SolverStatistics().phase(SolverStatistics.CANDIDATE_SOLVE):
+            self.ctl_move.solve(assumptions=self.control_assumptions(self.ctl_move, self.external_assumptions), on_model=self.on_projected_model)
+        return self.models_found > 0
+
+    def on_projected_model(self, model):
+        self.current_candidate = model.symbols(shown=True)
+        self.models_found += 1
+        self.print_projected_model(self.current_candidate)
+        SolverStatistics().model_found()
+
+    #assumptions given by the parent solver are symbols, but clingo removes from the domain the atoms that are false
+    #after a solve when it grounds again (e.g. atoms of P_1 falsified by a refinement for every candidate) and symbolic
+    #assumptions on removed atoms are not handled - they are mapped to literals, a removed atom is false
+    def control_assumptions(self, control, assumptions):
+        literals = []
+        symbolic_atoms = control.symbolic_atoms
+        for (symbol, value) in assumptions:
+            atom = symbolic_atoms[symbol]
+            #atoms removed from the domain or with literal 0 are fixed to false in the control
+            if not atom is None and atom.literal != 0:
+                literals.append(atom.literal if value else -atom.literal)
+            elif value:
+                literals.append(self.false_literal(control))
+        return literals
+
+    def false_literal(self, control):
+        if not control in self.false_literals:
+            with control.backend() as backend:
+                self.false_literals[control] = backend.add_atom()
+        return self.false_literals[control]
+
+    #solve for a candidate - the size of the ground program of the main solver is recorded at every candidate search
+    def solve_move(self, on_model=None):
+        with SolverStatistics().phase(SolverStatistics.CANDIDATE_SOLVE):
+            result = self.ctl_move.solve(assumptions=self.control_assumptions(self.ctl_move, self.external_assumptions), on_model=self.on_candidate if on_model is None else on_model)
+        if self.main_solver:
+            lp_statistics = self.ctl_move.statistics["problem"]["lp"]
+            SolverStatistics().ground_program_size(int(lp_statistics["atoms"]), int(lp_statistics["rules"]))
+        return result
+
+    #with weak constraints in P_2 and warm start the search is bounded by the cost of the last optimal counterexample search
+    #(models with a higher cost are pruned from the start) - the optimum of a new candidate may be higher, so the search
+    #is repeated without bound when there is no model within it
+    def solve_countermove(self, assumptions):
+        warm_start = self.settings.countermove_warm_start and self.ctl_countermove_has_weak and len(self.countermove_bound) > 0
+        if warm_start:
+            self.ctl_countermove.configuration.solve.opt_mode = "optN," + ",".join(str(cost) for cost in self.countermove_bound)
+        result = self.ctl_countermove.solve(assumptions=assumptions, on_model=self.on_counterexample)
+        if warm_start:
+            self.ctl_countermove.configuration.solve.opt_mode = "optN"
+            if result.unsatisfiable:
+                self.settings.logger.debug("%sNo counterexample within bound %s", self.output_pad, self.countermove_bound)
+                result = self.ctl_countermove.solve(assumptions=assumptions, on_model=self.on_counterexample)
+        if self.ctl_countermove_has_weak and result.satisfiable:
+            self.countermove_bound = list(self.current_counterexample_cost)
+        return result
+
+    #candidates of a speculative batch are checked in parallel on copies of ctl countermove
+    #only 2-ASP(Q) programs without weak constraints are checked speculatively
+    def speculative_batch_size(self):
+        if self.program_levels != 2 or self.programs_handler.program_contains_weak() or not self.programs_handler.global_weak_program is None:
+            return 1
+        return max(1, self.settings.speculative_candidates)
+
+    #enumerates up to batch size candidates differing on P_1 - the first one becomes the current candidate
+    def solve_move_batch(self, batch_size):
+        literals = self.first_program_index.literals
+        if self.projected_literals < len(literals):
+            with self.ctl_move.backend() as backend:
+                backend.add_project([literal for literal in literals[self.projected_literals:] if literal != 0])
+            self.projected_literals = len(literals)
+            self.ctl_move.configuration.solve.project = "project"
+        self.speculative_candidates = []
+        result = self.solve_move(lambda model: self.on_speculative_candidate(model, batch_size))
+        if len(self.speculative_candidates) > 0:
+            (self.first_program_index.values, self.current_candidate) = self.speculative_candidates[0]
+        return result
+
+    def on_speculative_candidate(self, model, batch_size):
+        if len(self.live_refinements) > 0:
+            self.mark_relevant_refinements(model)
+        self.speculative_candidates.append((self.first_program_index.model_values(model), model.symbols(shown=True)))
+        return len(self.speculative_candidates) < batch_size
+
+    #checks every candidate of the batch on its own copy of ctl countermove (solving releases the GIL, so copies run in parallel)
+    #returns the counterexamples if every candidate has one, otherwise the first candidate without counterexample becomes the current one
+    def check_speculative_candidates(self):
+        index = self.first_program_index
+        for i in range(1, len(self.countermove_controls)):
+            literals = self.countermove_controls_literals[i]
+            for position in index.countermove_positions[len(literals):]:
+                literals.append(self.countermove_controls[i].symbolic_atoms[index.symbols[position]].literal)
+
+        def check(i):
+            counterexample = []
+            def on_model(model):
+                counterexample.append(model.symbols(shown=True))
+                return False
+            assumptions = index.countermove_assumptions(self.speculative_candidates[i][0], self.countermove_controls_literals[i]) + external_assumptions[i]
+            self.countermove_controls[i].solve(assumptions=assumptions, on_model=on_model)
+            return counterexample[0] if len(counterexample) > 0 else None
+
+        #the literals of the assumptions are resolved before the copies are solved in parallel
+        external_assumptions = [self.control_assumptions(self.countermove_controls[i], self.external_assumptions) for i in range(len(self.speculative_candidates))]
+        with SolverStatistics().phase(SolverStatistics.COUNTEREXAMPLE_SOLVE):
+            if len(self.speculative_candidates) == 1:
+                counterexamples = [check(0)]
+            else:
+                with concurrent.futures.ThreadPoolExecutor(len(self.speculative_candidates)) as executor:
+                    counterexamples = list(executor.map(check, range(len(self.speculative_candidates))))
+        if not self.trace_record is None:
+            self.trace_record["candidates"] = len(self.speculative_candidates)
+        for i in range(len(counterexamples)):
+            if counterexamples[i] is None:
+                (index.values, self.current_candidate) = self.speculative_candidates[i]
+                return []
+        self.current_counterexample = counterexamples[0]
+        return counterexamples
+
+    #statistics collected by clingo for the controls of the solver
+    def clingo_statistics(self):
+        statistics = {"move" : self.ctl_move.statistics}
+        if not self.ctl_countermove is None:
+            statistics["countermove"] = self.ctl_countermove.statistics
+        return statistics
+
+    #the control receiving refinements (the refinement solver takes over from ctl move for n-ASPQ with n >= 3 once it is grounded)
+    def refinement_control(self):
+        if self.program_levels > 2 and not self.refinement_solver is None and self.refinement_solver.grounded:
+            return self.refinement_solver.ctl_move
+        return self.ctl_move
+
+    def start_trace_iteration(self):
+        if not CegarTrace().enabled():
+            return
+        self.end_trace_iteration()
+        self.trace_iterations += 1
+        self.trace_record = {"depth" : self.depth, "iteration" : self.trace_iterations}
+        SolverStatistics().switch_phase()
+        refinement_control = self.refinement_control()
+        self.trace_start = ({name : times[0] for (name, times) in SolverStatistics().phases.items()}, refinement_control, len(refinement_control.symbolic_atoms))
+
+    def trace_model(self, key, model, cost):
+        if not self.trace_record is None:
+            self.trace_record[key] = {"size" : len(model), "cost" : list(cost)}
+
+    #the record of an iteration is written when the next one starts or when the loop terminates
+    #times are the wall times of the phases (also of sub solvers) and refinement atoms are the atoms added to the refinement control
+    def end_trace_iteration(self):
+        if self.trace_record is None:
+            return
+        (start_times, start_control, start_atoms) = self.trace_start
+        SolverStatistics().switch_phase()
+        times = dict()
+        for (name, phase_times) in SolverStatistics().phases.items():
+            elapsed = phase_times[0] - start_times.get(name, 0.0)
+            if elapsed > 0:
+                times[name] = round(elapsed, 6)
+        self.trace_record["time"] = times
+        refinement_control = self.refinement_control()
+        self.trace_record["refinement_atoms"] = len(refinement_control.symbolic_atoms) - (start_atoms if refinement_control is start_control else 0)
+        CegarTrace().write(self.trace_record)
+        self.trace_record = None
+
     def recursive_cegar(self):
+        try:
+            return self.cegar()
+        finally:
+            self.end_trace_iteration()
+
+    def cegar(self):
         if self.program_levels == 1:
             # Program is \exists P_1:C or \forall P_1:C (with C possibly empty)
-            result = self.ctl_move.solve(assumptions=self.external_assumptions, on_model=self.on_candidate, on_finish=self.finished_search_for_candiate)
+            result = self.solve_move()
             if result.unsatisfiable:
                 #exists looses if P_1 \cup C unsat
                 #forall wins if P_1 \cup \neg C unsat
@@ -431,7 +712,11 @@ class ASPQSolver:
         #\exists P_1 \forall P_2 : C or
         #\forall P_1 \exists P_2 : C
         elif self.program_levels == 2:
+            batch_size = self.speculative_batch_size()
             while True:
+                self.start_trace_iteration()
+                if len(self.live_refinements) > 0:
+                    self.retire_refinements()
                 #add model M_1 of P_1 as assumption
                 self.assumptions = []
                 self.settings.logger.debug("%sSearching for candiate", self.output_pad)
@@ -441,7 +726,7 @@ class ASPQSolver:
                     for i in range(len(external_preds) -1):
                         self.ctl_move.assign_external(clingo.Function(external_preds[i]), False)
                     self.ctl_move.assign_external(clingo.Function(external_preds[-1]), True)
-                result = self.ctl_move.solve(assumptions=self.external_assumptions, on_model=self.on_candidate, on_finish=self.finished_search_for_candiate)
+                result = self.solve_move() if batch_size == 1 else self.solve_move_batch(batch_size)
                 if result.unsatisfiable:
                     self.settings.logger.debug("%sNo candiate found", self.output_pad)
                     #forall wins if P_1 has no sm
@@ -466,12 +751,26 @@ class ASPQSolver:
                             return True if self.programs_handler.forall_first() else False        
                         
                     self.settings.logger.debug("%sFound candiate %s", self.output_pad, self.current_candidate)
-                    self.construct_assumptions()
-                    #search for counterexample
+                    self.trace_model("candidate", self.current_candidate, self.current_candidate_cost)
+                    #search for counterexample - the candidate is fixed by assumptions on the literals of ctl countermove
                     self.settings.logger.debug("%sSearching for counterexample", self.output_pad)
-                    result = self.ctl_countermove.solve(assumptions=self.assumptions + self.external_assumptions, on_model=self.on_counterexample, on_finish=self.finished_search_for_counterexample)
+                    self.first_program_index.resolve_countermove_literals(self.ctl_countermove.symbolic_atoms)
+                    if batch_size == 1:
+                        with SolverStatistics().phase(SolverStatistics.COUNTEREXAMPLE_SOLVE):
+                            result = self.solve_countermove(self.first_program_index.countermove_assumptions() + self.control_assumptions(self.ctl_countermove, self.external_assumptions))
+                        counterexamples = [] if result.unsatisfiable else [self.current_counterexample]
+                    else:
+                        counterexamples = self.check_speculative_candidates()
                     #winning move for the first quantifier - no recursive call for 2-ASPQ
-                    if result.unsatisfiable:
+                    if len(counterexamples) == 0:
+                        #solvers of extensions are given symbolic assumptions
+                        if len(self.extension_counterexample_solvers) > 0:
+                            self.construct_assumptions()
+                        extension = self.extension_with_counterexample()
+                        if extension >= 0:
+                            self.refine_extension(extension, SolverStatistics().solvers_iterations)
+                            SolverStatistics().iteration_done()
+                            continue
                         self.settings.logger.debug("%sNo counterexample found", self.output_pad)
                         #forall wins if P_2 \cup \neg C has no sm
                         #exists looses if P_2 \cup C has no sm
@@ -484,38 +783,71 @@ class ASPQSolver:
                             self.settings.logger.debug("%sNo counterexample found", self.output_pad)
                             return True if self.programs_handler.exists_first() else False
                     self.settings.logger.debug("%sCounterexample found %s", self.output_pad, self.current_counterexample)
-                    self.counterexample_found += 1
-                    SolverStatistics().counterexample_found()
-                    if self.refinement_rewriter is None:
-                        if not self.programs_handler.program_contains_weak():
-                            self.refinement_rewriter = RefinementNoWeakRewriter([self.programs_handler.p(1)], self.programs_handler.c(), self.programs_handler.neg_c(), self.settings.ground_transformation)
-                            self.refinement_rewriter.compute_placeholder_program()
-                        else:
-                            self.refinement_rewriter = RefinementWeakRewriter([self.programs_handler.p(1)], self.programs_handler.c(), self.programs_handler.neg_c(), self.settings.ground_transformation)
-                            self.refinement_rewriter.compute_placeholder_program()
-
-                    self.refinement_rewriter.rewrite(self.current_counterexample, SolverStatistics().solvers_iterations)
-                    refine_program = self.refinement_rewriter.refined_program()
+                    self.trace_model("counterexample", self.current_counterexample, self.current_counterexample_cost)
+                    self.counterexample_found += len(counterexamples)
+                    for _ in counterexamples:
+                        SolverStatistics().counterexample_found()
+                    #candidates of a speculative batch often share their counterexample
+                    counterexamples = [counterexample for counterexample in counterexamples if self.new_refinement(self.programs_handler.p(1), counterexample)]
+                    with SolverStatistics().phase(SolverStatistics.REFINEMENT):
+                        if self.refinement_rewriter is None:
+                            if not self.programs_handler.program_contains_weak():
+                                if self.settings.ground_refinement:
+                                    self.refinement_rewriter = GroundRefinementRewriter([self.programs_handler.p(1)], self.programs_handler.c(), self.programs_handler.neg_c(), self.settings.ground_transformation, self.ctl_move, self.choice_str + self.programs_handler.instance, [atom.symbol for atom in self.ctl_countermove.symbolic_atoms])
+                                    self.refinement_rewriter.compute_placeholder_program()
+                                    if self.refinements_retirable():
+                                        self.refinement_rewriter.activation_atom_name = SolverSettings.REFINEMENT_ACTIVE_ATOM_NAME
+                                    self.ground_refinement = self.refinement_rewriter.supported
+                                    if not self.ground_refinement:
+                                        self.settings.logger.debug("%sGround refinement not supported for this program, falling back to textual refinement", self.output_pad)
+                                if not self.ground_refinement:
+                                    self.refinement_rewriter = self.cached_refinement_rewriter()
+                            else:
+                                self.refinement_rewriter = RefinementWeakRewriter([self.programs_handler.p(1)], self.programs_handler.c(), self.programs_handler.neg_c(), self.settings.ground_transformation)
+                                self.refinement_rewriter.compute_placeholder_program()
+
+                        #refinements without weak constraints are instances of the same template program
+                        #counterexamples of a speculative batch are all refined in a single grounding step
+                        if not self.ground_refinement and not self.programs_handler.program_contains_weak():
+                            refinements = []
+                            for counterexample in counterexamples:
+                                refinements.append((counterexample, SolverStatistics().solvers_iterations))
+                                SolverStatistics().iteration_done()
+                            self.ground_refinement_template(self.refinement_rewriter, refinements, self.refinements_retirable())
+                            for (counterexample, iteration) in refinements:
+                                self.activate_refinement(counterexample, iteration)
+                            continue
+                        #ground refinement is added to ctl move through the backend
+                        if self.ground_refinement:
+                            for counterexample in counterexamples:
+                                self.refinement_rewriter.rewrite(counterexample, SolverStatistics().solvers_iterations)
+                                self.settings.logger.debug("%sAdded %d ground rules of refinement to ctl move", self.output_pad, self.refinement_rewriter.added_rules)
+                                self.activate_refinement(counterexample, SolverStatistics().solvers_iterations)
+                                SolverStatistics().iteration_done()
+                            continue
+                        self.refinement_rewriter.rewrite(self.current_counterexample, SolverStatistics().solvers_iterations)
+                        refine_program = self.refinement_rewriter.refined_program()
                     
-                    #Add a new external predicate and store new refinement predicates (fail_M, dominated_M, violated_condition_M)
-                    if self.programs_handler.p(1).contains_weak():
-                        self.ctl_move_has_weak = True
-                        refine_program += f"#external {self.refinement_rewriter.external_predicates[-1]}.\n"
-                        self.fail_atoms.append(clingo.Function(self.refinement_rewriter.current_fail_predicate, []))
-                        self.dominated_atoms.append(clingo.Function(self.refinement_rewriter.current_dominated_predicate, []))
-                        self.violated_constraint_atoms.append(clingo.Function(self.refinement_rewriter.current_unsat_c_predicate, []))
+                        #Add a new external predicate and store new refinement predicates (fail_M, dominated_M, violated_condition_M)
+                        if self.programs_handler.p(1).contains_weak():
+                            self.ctl_move_has_weak = True
+                            refine_program += f"#external {self.refinement_rewriter.external_predicates[-1]}.\n"
+                            self.fail_atoms.append(clingo.Function(self.refinement_rewriter.current_fail_predicate, []))
+                            self.dominated_atoms.append(clingo.Function(self.refinement_rewriter.current_dominated_predicate, []))
+                            self.violated_constraint_atoms.append(clingo.Function(self.refinement_rewriter.current_unsat_c_predicate, []))
                     
-                    self.settings.logger.debug("%sResult of refinement:\n%s", self.output_pad, refine_program)
-                    self.ctl_move.add(f"iteration_{SolverStatistics().solvers_iterations}", [], refine_program)
-                    self.ctl_move.ground([(f"iteration_{SolverStatistics().solvers_iterations}", [])])
-                    SolverStatistics().iteration_done()
+                        self.settings.logger.debug("%sResult of refinement:\n%s", self.output_pad, refine_program)
+                        self.ctl_move.add(f"iteration_{SolverStatistics().solvers_iterations}", [], refine_program)
+                        self.ctl_move.ground([(f"iteration_{SolverStatistics().solvers_iterations}", [])])
+                        SolverStatistics().iteration_done()
         else:
             self.settings.logger.debug("%sInside recursive cegar for n-ASPQ with n >=3", self.output_pad)
             while True:
+                self.start_trace_iteration()
                 self.assumptions = []
                 if self.refinement_solver is None:
                     #on the first iteration is just a solve on the outermost program
-                    result = self.ctl_move.solve(assumptions = self.external_assumptions, on_model=self.on_candidate, on_finish=self.finished_search_for_candiate)
+                    result = self.solve_move()
                     if result.unsatisfiable:
                         #no move, current quantifier looses
                         return False if self.exists_first else True
@@ -523,36 +855,39 @@ class ASPQSolver:
                         self.settings.logger.debug("%sFound candiate %s", self.output_pad, self.current_candidate)
                         self.construct_assumptions()
                 else:
-                    if self.program_levels > 3:
-                        satisfiable = self.refinement_solver.solve_n_levels(self.external_assumptions, self.choice_str)
-                        SolverStatistics().iteration_done()
-                                                
-                        if not satisfiable:
-                            return False if self.exists_first else True
-                        else:
-                            self.refinement_rewriter.construct_assumptions()
-                            self.settings.logger.debug("%sFound candiate %s", self.output_pad, self.current_candidate)
+                    #the refinement solver contains P_1 in its first program and computes the next candidate
+                    with SolverStatistics().phase(SolverStatistics.CANDIDATE_SOLVE):
+                        satisfiable = self.refinement_solver.solve_n_levels(self.external_assumptions, self.external_choice_str)
+                    SolverStatistics().iteration_done()
+
+                    if not satisfiable:
+                        return False if self.exists_first else True
                     else:
-                        result = self.ctl_move.solve(assumptions=self.external_assumptions, on_model=self.on_candidate, on_finish=self.finished_search_for_candiate)
-                        if result.unsatisfiable:
-                            return False if self.exists_first else True
-                        else:
-                            self.settings.logger.debug("%sFound candiate %s", self.output_pad, self.current_candidate)
+                        self.current_candidate = self.refinement_solver.current_candidate
+                        self.first_program_index.set_candidate(self.current_candidate)
+                        self.settings.logger.debug("%sFound candiate %s", self.output_pad, self.current_candidate)
 
+                self.trace_model("candidate", self.current_candidate, self.current_candidate_cost if self.refinement_solver is None else self.refinement_solver.current_candidate_cost)
 
-                if self.counterexample_rewriter is None:
-                    self.counterexample_rewriter = CounterexampleRewriter(self.programs_handler.programs_list[1:len(self.programs_handler.programs_list)-1], self.programs_handler.c(), self.programs_handler.neg_c())
-                
-                self.counterexample_rewriter.rewrite(self.current_candidate_symbols_set, self.symbols_defined_in_first_program, self.programs_handler.p(0).head_predicates)
-                #this is always an ASPQ program with two or more levels
-                ce_programs_handler = ProgramsHandler(self.counterexample_rewriter.rewritten_program(), self.programs_handler.instance)
-                self.counterexample_solver = ASPQSolver(ce_programs_handler, self.sub_solvers_settings, False, self.depth +1)
+                #the counterexample solver is built and grounded once - the candidate is given through assumptions
+                if self.counterexample_solver is None:
+                    #this is always an ASPQ program with two or more levels
+                    ce_programs_handler = self.programs_handler.cached("counterexample_programs", self.counterexample_programs_handler).with_instance(self.programs_handler.instance)
+                    self.counterexample_solver = ASPQSolver(ce_programs_handler, self.sub_solvers_settings, False, self.depth +1)
 
                 self.construct_assumptions()
-                satisfiable = self.counterexample_solver.solve_n_levels(self.external_assumptions + self.assumptions, self.choice_str)
+                with SolverStatistics().phase(SolverStatistics.COUNTEREXAMPLE_SOLVE):
+                    satisfiable = self.counterexample_solver.solve_n_levels(self.external_assumptions + self.assumptions, self.choice_str)
                 
                 if satisfiable:
                     SolverStatistics().counterexample_found()
+                    self.trace_model("counterexample", self.counterexample_solver.current_candidate, self.counterexample_solver.current_candidate_cost)
+                else:
+                    extension = self.extension_with_counterexample()
+                    if extension >= 0:
+                        self.refine_extension(extension, SolverStatistics().solvers_iterations)
+                        SolverStatistics().iteration_done()
+                        continue
                 #no counterexample
                 if not satisfiable and self.programs_handler.forall_first():
                     return False
@@ -563,33 +898,176 @@ class ASPQSolver:
                 #a counterexample was found
                 SolverStatistics().iteration_done()
                 if self.refinement_rewriter is None:
-                    self.refinement_rewriter = RefinementNoWeakRewriter(self.programs_handler.programs_list[1:len(self.programs_handler.programs_list)-1], self.programs_handler.c(), self.programs_handler.neg_c(), self.settings.ground_transformation)
-                    self.refinement_rewriter.compute_placeholder_program()
-                self.refinement_rewriter.rewrite(self.counterexample_solver.current_candidate, SolverStatistics().solvers_iterations)
-                #program with potentially first quantifiers collapsed and the or applied to remaining quantifiers (and also C)
-                refinement = self.refinement_rewriter.refined_program()
-
-                #refinement is an ASP program and can be directly added to the ctl_move
-                if type(refinement) == str:
-                    self.ctl_move.add(f"iteration_{SolverStatistics().solvers_iterations}", [], refinement)
-                    self.ctl_move.ground([(f"iteration_{SolverStatistics().solvers_iterations}", [])])
-                else: #refinement is an ASPQ
-                    if self.refinement_solver == None:
-                        refinement_handler =  ProgramsHandler(refinement, self.programs_handler.instance)
-                        #add rules from P_1 into refinement which containts only programs from P_2
-                        refinement[0].rules += self.programs_handler.p(0).rules
-                        self.refinement_solver = ASPQSolver(refinement_handler, self.sub_solvers_settings, False, self.depth +1)
-                    else:
-                        assert len(refinement_handler.programs_list) == len(self.refinement_solver.programs_handler.programs_list)
-                        #update programs handler of of refinement_solver by extending programs with result of refinement
-                        for i in range(len(refinement_handler.programs_list)):
-                            self.refinement_solver.programs_handler.programs_list[i].rules += refinement_handler.programs_list[i].rules
+                    self.refinement_rewriter = self.cached_refinement_rewriter()
+                self.refine(self.refinement_rewriter, self.counterexample_solver.current_candidate, SolverStatistics().solvers_iterations)
                 SolverStatistics().iteration_done()
+
+    #rewriters depending only on the programs are cached in the programs handler and shared by the solvers of every instance
+    def cached_refinement_rewriter(self):
+        def refinement_rewriter():
+            refinement_rewriter = RefinementNoWeakRewriter(self.programs_handler.programs_list[1:len(self.programs_handler.programs_list)-1], self.programs_handler.c(), self.programs_handler.neg_c(), self.settings.ground_transformation)
+            refinement_rewriter.compute_placeholder_program()
+            return refinement_rewriter
+        return self.programs_handler.cached(f"refinement_rewriter_{self.settings.ground_transformation}", refinement_rewriter)
+
+    def counterexample_programs_handler(self):
+        counterexample_rewriter = CounterexampleRewriter(self.programs_handler.programs_list[1:len(self.programs_handler.programs_list)-1], self.programs_handler.c(), self.programs_handler.neg_c())
+        counterexample_rewriter.rewrite()
+        return ProgramsHandler(counterexample_rewriter.rewritten_program(), "")
+
+    #refinements of 2-ASP(Q) programs without weak constraints stay in ctl move until they are retired, so a counterexample
+    #that was already refined (i.e. with the same projection on the atoms of P_2) is skipped and counted in the statistics
+    #not used for n-ASP(Q) programs, where the refinement solver may propose again a refuted candidate and the refinement
+    #(a new extension) is needed for the search to move on
+    def new_refinement(self, program, counterexample):
+        if self.programs_handler.program_contains_weak():
+            return True
+        key = self.counterexample_key(program, counterexample)
+        refined = self.refined_counterexamples.setdefault(program, set())
+        if key in refined:
+            self.settings.logger.debug("%sCounterexample already refined", self.output_pad)
+            SolverStatistics().refinement_skipped()
+            return False
+        refined.add(key)
+        return True
+
+    def counterexample_key(self, program, counterexample):
+        return frozenset(symbol for symbol in counterexample if symbol.name in program.head_predicates)
+
+    #refinements of 2-ASP(Q) programs without weak constraints are guarded by an activation external when they can be retired
+    def refinements_retirable(self):
+        return self.settings.refinement_lifetime > 0 and self.program_levels == 2 and not self.programs_handler.program_contains_weak()
+
+    #the refinement of the given iteration is live until it is not relevant for refinement_lifetime candidates
+    def activate_refinement(self, counterexample, iteration):
+        if not self.refinements_retirable():
+            return
+        activation = clingo.Function(SolverSettings.REFINEMENT_ACTIVE_ATOM_NAME, [clingo.Number(iteration)])
+        if self.ground_refinement:
+            fail = clingo.Function(f"{RefinementRewriter.FAIL_ATOM_NAME}{iteration}", [])
+        else:
+            self.ctl_move.assign_external(activation, True)
+            fail = clingo.Function(RefinementRewriter.FAIL_ATOM_NAME, [clingo.Number(iteration)])
+        key = self.counterexample_key(self.programs_handler.p(1), counterexample)
+        if key in self.retired_counterexamples:
+            return
+        fail_atom = self.ctl_move.symbolic_atoms[fail]
+        self.live_refinements[iteration] = [activation, None if fail_atom is None else fail_atom.literal, key, self.candidates_checked]
+
+    #a refinement is relevant for a candidate if its counterexample is still an answer set of P_2 for the candidate (its fail atom is false)
+    def mark_relevant_refinements(self, model):
+        self.candidates_checked += 1
+        is_true = model.is_true
+        for refinement in self.live_refinements.values():
+            if refinement[1] is None or not is_true(refinement[1]):
+                refinement[3] = self.candidates_checked
+
+    #releasing the external removes the rules of the refinement from ctl move - its counterexample can be refined again later
+    def retire_refinements(self):
+        retired = [iteration for (iteration, refinement) in self.live_refinements.items() if self.candidates_checked - refinement[3] >= self.settings.refinement_lifetime]
+        for iteration in retired:
+            (activation, _, key, _) = self.live_refinements.pop(iteration)
+            self.ctl_move.release_external(activation)
+            self.refined_counterexamples[self.programs_handler.p(1)].discard(key)
+            self.retired_counterexamples.add(key)
+            SolverStatistics().refinement_retired()
+        if len(retired) > 0:
+            self.settings.logger.debug("%sRetired %d refinements", self.output_pad, len(retired))
+
+    def refine(self, refinement_rewriter, counterexample, iteration):
+        with SolverStatistics().phase(SolverStatistics.REFINEMENT):
+            #refinement is an ASP program and can be grounded as an instance of the template program
+            if not refinement_rewriter.refinement_is_aspq():
+                self.ground_refinement_template(refinement_rewriter, [(counterexample, iteration)])
+                return
+            refinement_rewriter.rewrite(counterexample, iteration)
+            #program with first quantifiers collapsed and the or applied to remaining quantifiers (and also C)
+            refinement = refinement_rewriter.refined_program()
+            if self.refinement_solver is None:
+                #add rules from P_1 (and the ones extending it) into refinement which containts only programs from P_2
+                refinement[0].rules += "\n".join([self.programs_handler.p(0).rules, *self.first_program_extensions])
+                refinement[0].head_predicates = refinement[0].head_predicates | self.programs_handler.p(0).head_predicates
+                refinement_handler = ProgramsHandler(refinement, self.programs_handler.instance)
+                self.refinement_solver = ASPQSolver(refinement_handler, self.sub_solvers_settings, False, self.depth +1)
+            else:
+                #only the new refinement is grounded by the refinement solver
+                self.refinement_solver.extend_programs(refinement)
+
+    #the template is parsed once, then every refinement only adds the counterexample facts and grounds a new instance
+    #refinements are given as (counterexample, iteration) and their instances are grounded together
+    #rules of guarded templates are guarded by the activation external of their iteration
+    def ground_refinement_template(self, refinement_rewriter, refinements, guarded=False):
+        #the rewriter (and so its template) might be shared with solvers of other instances
+        if not refinement_rewriter.template_program_name in self.added_templates:
+            refinement_rewriter.compute_template_program()
+            self.added_templates.add(refinement_rewriter.template_program_name)
+            template_program = refinement_rewriter.template_program
+            if guarded:
+                template_program = ActivationRewriter(SolverSettings.REFINEMENT_ACTIVE_ATOM_NAME, RefinementNoWeakRewriter.ITERATION_PARAMETER).rewrite(template_program)
+            self.settings.logger.debug("%sRefinement template:\n%s", self.output_pad, template_program)
+            self.ctl_move.add(refinement_rewriter.template_program_name, [RefinementNoWeakRewriter.ITERATION_PARAMETER], template_program)
+        with self.ctl_move.backend() as backend:
+            for (counterexample, iteration) in refinements:
+                for symbol in refinement_rewriter.counterexample_template_symbols(counterexample, iteration):
+                    backend.add_rule([backend.add_atom(symbol)])
+        self.ctl_move.ground([(refinement_rewriter.template_program_name, [clingo.Number(iteration)]) for (_, iteration) in refinements])
+
+    #extends the ASPQ with a refinement (one program per level) - refinements share only atoms of the first program
+    #so the first program is extended with the new rules and the other levels are checked and refined on their own
+    def extend_programs(self, programs):
+        if not self.grounded:
+            raise Exception("Solver must be grounded before being extended")
+        extension_name = f"extension_{self.grounded_extensions}"
+        self.grounded_extensions += 1
+        self.settings.logger.debug("%sAdded extension of first program to ctl move:\n%s", self.output_pad, programs[0].rules)
+        self.ctl_move.add(extension_name, [], programs[0].rules)
+        self.ctl_move.ground([(extension_name, [])])
+        if self.program_levels > 2:
+            self.first_program_extensions.append(programs[0].rules)
+            if not self.refinement_solver is None:
+                self.refinement_solver.extend_programs(self.first_program_extension(programs[0].rules, self.refinement_solver))
+
+        choice = []
+        for (name, arity, positive) in self.ctl_move.symbolic_atoms.signatures:
+            if name in programs[0].head_predicates:
+                for atom in self.ctl_move.symbolic_atoms.by_signature(name, arity, positive):
+                    if self.first_program_index.add(atom.symbol, atom.literal, self.p1_predicates_are_output):
+                        choice.append(str(atom.symbol))
+        if len(choice) > 0:
+            self.choice_str += "{" + ";".join(choice) + "}. "
+
+        if all(program.rules == "" for program in programs[1:]):
+            return
+        extension_handler = ProgramsHandler(programs, self.programs_handler.instance)
+        counterexample_rewriter = CounterexampleRewriter(extension_handler.programs_list[1:len(extension_handler.programs_list)-1], extension_handler.c(), extension_handler.neg_c())
+        counterexample_rewriter.rewrite()
+        ce_programs_handler = ProgramsHandler(counterexample_rewriter.rewritten_program(), self.programs_handler.instance)
+        self.extension_counterexample_solvers.append(ASPQSolver(ce_programs_handler, self.sub_solvers_settings, False, self.depth +1))
+        refinement_rewriter = RefinementNoWeakRewriter(extension_handler.programs_list[1:len(extension_handler.programs_list)-1], extension_handler.c(), extension_handler.neg_c(), self.settings.ground_transformation)
+        refinement_rewriter.compute_placeholder_program()
+        refinement_rewriter.template_program_name = f"{RefinementNoWeakRewriter.TEMPLATE_PROGRAM_NAME}_{extension_name}"
+        self.extension_refinement_rewriters.append(refinement_rewriter)
+
+    #index of the first extension admitting a counterexample for the current candidate (-1 if there is none)
+    def extension_with_counterexample(self):
+        for i in range(len(self.extension_counterexample_solvers)):
+            with SolverStatistics().phase(SolverStatistics.COUNTEREXAMPLE_SOLVE):
+                satisfiable = self.extension_counterexample_solvers[i].solve_n_levels(self.external_assumptions + self.assumptions, self.choice_str)
+            if satisfiable:
+                self.settings.logger.debug("%sCounterexample found for extension %d", self.output_pad, i)
+                SolverStatistics().counterexample_found()
+                return i
+        return -1
+
+    def refine_extension(self, index, iteration):
+        self.refine(self.extension_refinement_rewriters[index], self.extension_counterexample_solvers[index].current_candidate, iteration)
+
+    #extension of the given solver with rules in its first program only
+    def first_program_extension(self, rules, solver):
+        extension = [QuantifiedProgram(rules, [], solver.programs_handler.p(0).program_type, solver.programs_handler.p(0).name, set())]
+        for program in solver.programs_handler.programs_list[1:]:
+            extension.append(QuantifiedProgram("", [], program.program_type, program.name, set()))
+        return extension
                 
     def construct_assumptions(self):
-        self.assumptions = []
-        for symbol in self.symbols_defined_in_first_program.keys():
-            if symbol in self.current_candidate_symbols_set and symbol.name in self.programs_handler.p(0).head_predicates:
-                self.assumptions.append((symbol, True))
-            else:
-                self.assumptions.append((symbol, False))
+        self.assumptions = self.first_program_index.assumptions()
@@ -0,0 +1,44 @@
+# Copyright [2025] [Andrea Cuteri, Giuseppe Mazzotta and Francesco Ricca]
+
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+
+#        http://www.apache.org/licenses/LICENSE-2.0
+
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+import clingo
+import clingo.ast
+from clingo.ast import parse_string
+
+
+#guards every rule of a (possibly parametric) program with an external activation atom over the given parameter
+#the rules are removed from the solver once the external is released
+class ActivationRewriter(clingo.ast.Transformer):
+    activation_atom_name : str
+    parameter : str
+    program : list
+
+    def __init__(self, activation_atom_name, parameter):
+        super().__init__()
+        self.activation_atom_name = activation_atom_name
+        self.parameter = parameter
+        self.program = []
+
+    def visit_Rule(self, node):
+        term = clingo.ast.Function(node.location, self.parameter, [], False)
+        activation_atom = clingo.ast.SymbolicAtom(clingo.ast.Function(node.location, self.activation_atom_name, [term], False))
+        return node.update(body=[*node.body, clingo.ast.Literal(node.location, clingo.ast.Sign.NoSign, activation_atom)])
+
+    def add_statement(self, statement):
+        if statement.ast_type != clingo.ast.ASTType.Program:
+            self.program.append(str(self(statement)))
+
+    def rewrite(self, program):
+        self.program = [f"#external {self.activation_atom_name}({self.parameter})."]
+        parse_string(program, self.add_statement)
+        return "\n".join(self.program)
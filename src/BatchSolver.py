@@ -0,0 +1,71 @@
+# Copyright [2025] [Andrea Cuteri, Giuseppe Mazzotta and Francesco Ricca]
+
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+
+#        http://www.apache.org/licenses/LICENSE-2.0
+
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+import multiprocessing
+import os
+import signal
+from pathlib import Path
+
+#encoding already parsed and rewritten - set once in every worker process
+_worker_state = None
+
+def _init_worker(solve_record, prepared, args):
+    global _worker_state
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker_state = (solve_record, prepared, args)
+
+#solves the encoding against one instance and returns the result record of the instance
+def _solve_instance(instance_path):
+    (solve_record, prepared, args) = _worker_state
+    record = {"instance" : instance_path}
+    try:
+        instance_program = "\n".join(open(instance_path).readlines())
+    except Exception as e:
+        record.update({"exit_code" : 1, "error" : str(e)})
+        return record
+    record.update(solve_record(prepared, instance_program, args))
+    return record
+
+#solves one encoding against many instances with a pool of worker processes
+#the encoding is parsed and rewritten once and handed to every worker, each instance only adds its facts
+class BatchSolver:
+    solve_record : object
+    prepared : tuple
+    args : object
+    workers : int
+
+    def __init__(self, solve_record, prepared, args, workers):
+        self.solve_record = solve_record
+        self.prepared = prepared
+        self.args = args
+        self.workers = workers if workers > 0 else os.cpu_count()
+
+    #instances are either the files of a directory or the paths listed in a manifest (relative to the manifest)
+    @staticmethod
+    def instance_paths(path):
+        batch_path = Path(path)
+        if batch_path.is_dir():
+            return [str(instance) for instance in sorted(batch_path.iterdir()) if instance.is_file()]
+        instance_paths = []
+        for line in open(batch_path).readlines():
+            line = line.strip()
+            if line != "":
+                instance_paths.append(str(batch_path.parent / line))
+        return instance_paths
+
+    #yields one record per instance, in the order of the instances
+    def run(self, instance_paths):
+        with multiprocessing.Pool(self.workers, initializer=_init_worker, initargs=(self.solve_record, self.prepared, self.args)) as pool:
+            for record in pool.imap(_solve_instance, instance_paths):
+                yield record
@@ -0,0 +1,45 @@
+# Copyright [2025] [Andrea Cuteri, Giuseppe Mazzotta and Francesco Ricca]
+
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+
+#        http://www.apache.org/licenses/LICENSE-2.0
+
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+import json
+
+#json lines trace with one record per iteration of the cegar loop of every solver (shared by the main solver and all its sub solvers)
+#every record is flushed as soon as it is written, so that the trace of a killed run is usable
+class CegarTrace:
+    _instance = None
+    output : object
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super(CegarTrace, cls).__new__(cls)
+            cls._instance.output = None
+        return cls._instance
+
+    def __init__(self):
+        pass
+
+    def open(self, path):
+        self.close()
+        self.output = open(path, "w")
+
+    def close(self):
+        if not self.output is None:
+            self.output.close()
+            self.output = None
+
+    def enabled(self):
+        return not self.output is None
+
+    def write(self, record):
+        self.output.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self.output.flush()
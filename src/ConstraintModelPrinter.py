@@ -16,15 +16,9 @@ from .ModelPrinter import ModelPrinter
 
 class ConstraintModelPrinter(ModelPrinter):
     
-    def __init__(self):
-        pass
+    def __init__(self, output):
+        super().__init__(output)
     
     def print_model(self, model, p1_symbols):
-        print("Model:{", end="")
-
-        for symbol in p1_symbols:
-            if symbol in model:
-                print(":- not ", symbol, ". ",end="")
-            else:
-                print(":- ", symbol, ". ",end="")
-        print("}")
\ No newline at end of file
+        model_symbols_set = set(model)
+        self.output.write("Model:{" + "".join(f":- not  {symbol} . " if symbol in model_symbols_set else f":-  {symbol} . " for symbol in p1_symbols) + "}\n")
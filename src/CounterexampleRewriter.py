@@ -22,7 +22,6 @@ class CounterexampleRewriter:
     rewritten_programs_list : list
     flip_quantifier_and_constraint: bool
     first_rewrite : bool
-    first_program_rewritten : str
 
     def __init__(self, original_programs, program_c, program_neg_c):
         self.original_programs_list = original_programs
@@ -42,30 +41,22 @@ class CounterexampleRewriter:
         return self.rewritten_programs_list
 
 
-    def rewrite(self, model, p1_symbols, p1_predicates):
-        #on the first call construct counterexample program
-        #on subsequent calls the counterexample program can be reused
-        #but the assumptions have to be updated
-        if self.first_rewrite:
-            self.rewritten_programs_list = []
-            for i in range(len(self.original_programs_list)-1):
-                quantifier = None
-                if self.flip_quantifier_and_constraint:
-                    quantifier = ProgramQuantifier.EXISTS  if self.original_programs_list[i].program_type == ProgramQuantifier.FORALL else ProgramQuantifier.FORALL
-                else:
-                    quantifier = self.original_programs_list[i].program_type
-                prg = self.original_programs_list[i]
-                self.rewritten_programs_list.append(QuantifiedProgram(prg.rules, [], quantifier, prg.name, prg.head_predicates))        
+    #the counterexample program is constructed once and reused for every candidate
+    #the candidate of P_1 is not added as facts but passed to the counterexample solver as assumptions
+    def rewrite(self):
+        if not self.first_rewrite:
+            return
+        self.rewritten_programs_list = []
+        for i in range(len(self.original_programs_list)-1):
+            quantifier = None
             if self.flip_quantifier_and_constraint:
-                self.rewritten_programs_list.append(self.negated_constraint_program)
+                quantifier = ProgramQuantifier.EXISTS  if self.original_programs_list[i].program_type == ProgramQuantifier.FORALL else ProgramQuantifier.FORALL
             else:
-                self.rewritten_programs_list.append(self.constraint_program)
-            self.first_program_rewritten = self.rewritten_programs_list[0].rules
-        
-        assumptions = []
-        for symbol in p1_symbols:
-            if symbol in model and symbol.name in p1_predicates:
-                assumptions.append(f"{symbol}.")
-            # else:
-            #     assumptions.append(f"not {symbol}.")
-        self.rewritten_programs_list[0].rules = self.first_program_rewritten + " ".join(assumptions)
\ No newline at end of file
+                quantifier = self.original_programs_list[i].program_type
+            prg = self.original_programs_list[i]
+            self.rewritten_programs_list.append(QuantifiedProgram(prg.rules, [], quantifier, prg.name, prg.head_predicates))        
+        if self.flip_quantifier_and_constraint:
+            self.rewritten_programs_list.append(self.negated_constraint_program)
+        else:
+            self.rewritten_programs_list.append(self.constraint_program)
+        self.first_rewrite = False
@@ -0,0 +1,109 @@
+# Copyright [2025] [Andrea Cuteri, Giuseppe Mazzotta and Francesco Ricca]
+
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+
+#        http://www.apache.org/licenses/LICENSE-2.0
+
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+from .RefinementGlobalWeakRewriter import RefinementGlobalWeakRewriter
+
+#choice of the bounds probed by the optimization of global weak constraints
+#a probe with bound B looks for a quantified answer set whose (encoded) cost is lower than B - if it finds one the
+#upper bound becomes its cost, otherwise B is a lower bound of the optimum
+#refinements added to ctl move are valid for every bound, so they are kept across probes
+class GlobalWeakSearch:
+    #upper bound improving - every probe asks for a model better than the last one
+    LINEAR : str = "linear"
+    #bisection between the lower and the upper bound of the cost
+    BISECTION : str = "bisection"
+    #levels are optimized one at a time from the highest one, upper bound improving within the level
+    LEXICOGRAPHIC : str = "lexicographic"
+    #levels are optimized one at a time from the highest one, alternating bisection and upper bound probes within the level
+    STRATIFIED : str = "stratified"
+    STRATEGIES : list = [LINEAR, BISECTION, LEXICOGRAPHIC, STRATIFIED]
+
+    strategy : str
+    rewriter : RefinementGlobalWeakRewriter
+    lower_bound : int
+    upper_bound : int
+    #violations for level of the best model found
+    upper_bound_violations : dict
+    #bound of the last probe (None if the optimum is proven)
+    probe : int
+    #levels optimized one at a time (from the highest one), index of the current one and bound of the levels above it
+    levels : list
+    level_index : int
+    level_prefix : int
+    #no model with the violations of the levels above and less than this many violations at the current level
+    level_lower_bound : int
+    level_probe : int
+    bisection_probe : bool
+
+    def __init__(self, strategy, rewriter):
+        if not strategy in self.STRATEGIES:
+            raise Exception(f"Unknown global weak strategy {strategy}")
+        self.strategy = strategy
+        self.rewriter = rewriter
+        self.lower_bound = 0
+        self.upper_bound = None
+        self.upper_bound_violations = dict()
+        self.probe = None
+        self.levels = []
+        self.level_index = 0
+        self.level_prefix = 0
+        self.level_lower_bound = 0
+        self.level_probe = 0
+        self.bisection_probe = True
+
+    def by_level(self):
+        return self.strategy in [self.LEXICOGRAPHIC, self.STRATIFIED]
+
+    #the last probe found a model with the given cost and violations for level
+    def improved(self, bound, violations):
+        if len(self.levels) == 0:
+            self.levels = sorted(self.rewriter.sorted_levels, reverse=True)
+        self.upper_bound = bound
+        self.upper_bound_violations = dict(violations)
+
+    #the last probe found no model
+    def failed(self):
+        self.lower_bound = self.probe
+        self.level_lower_bound = self.level_probe
+
+    #bound of the next probe, None if the last model is optimum
+    def next_bound(self):
+        if self.by_level():
+            self.probe = self.next_level_bound()
+        elif self.lower_bound >= self.upper_bound:
+            self.probe = None
+        elif self.strategy == self.BISECTION:
+            self.probe = self.lower_bound + (self.upper_bound - self.lower_bound + 1) // 2
+        else:
+            self.probe = self.upper_bound
+        return self.probe
+
+    def next_level_bound(self):
+        #levels whose violations are proven minimal are fixed
+        while self.level_index < len(self.levels):
+            level = self.levels[self.level_index]
+            if self.level_lower_bound < self.upper_bound_violations[level]:
+                break
+            self.level_prefix += self.upper_bound_violations[level] * self.rewriter.level_scale[level]
+            self.level_index += 1
+            self.level_lower_bound = 0
+        if self.level_index == len(self.levels):
+            return None
+        level = self.levels[self.level_index]
+        level_upper_bound = self.upper_bound_violations[level]
+        self.level_probe = level_upper_bound
+        if self.strategy == self.STRATIFIED:
+            if self.bisection_probe:
+                self.level_probe = self.level_lower_bound + (level_upper_bound - self.level_lower_bound + 1) // 2
+            self.bisection_probe = not self.bisection_probe
+        return self.level_prefix + self.level_probe * self.rewriter.level_scale[level]
@@ -0,0 +1,291 @@
+# Copyright [2025] [Andrea Cuteri, Giuseppe Mazzotta and Francesco Ricca]
+
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+
+#        http://www.apache.org/licenses/LICENSE-2.0
+
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+import clingo
+
+from .ClingoLogger import ClingoLogger
+from .RefinementObserver import RefinementObserver
+from .RefinementNoWeakRewriter import RefinementNoWeakRewriter
+from .RefinementRewriter import RefinementRewriter
+
+
+#Takes P_2 : C as programs (2-ASPQ without weak constraints)
+#the refinement is grounded once over a template iteration (with the counterexample atoms left open as externals)
+#and every subsequent refinement is added to the target control through the backend by renaming the atoms of the template
+class GroundRefinementRewriter(RefinementRewriter):
+    TEMPLATE_ITERATION : int = 0
+
+    SHARED_ATOM : int = 0
+    COUNTEREXAMPLE_ATOM : int = 1
+    ITERATION_ATOM : int = 2
+
+    original_programs_list : list
+    rewritten_programs_list : list
+    textual_rewriter : RefinementNoWeakRewriter
+    ctl_target : clingo.Control
+    context_program : str
+    counterexample_domain : list
+    observer : RefinementObserver
+    supported : bool
+    #template atom -> kind of the atom
+    atom_kind : dict
+    #template atom -> symbol of the same atom in the target control
+    shared_atoms : dict
+    #template atom -> symbol of P_2 that the atom represents
+    counterexample_atoms : dict
+    #template atom -> (renamed predicate prefix, arguments, sign) or None for auxiliary atoms
+    iteration_atoms : dict
+    #template atom -> literal in the target control (resolved once)
+    shared_literals : dict
+    #symbol of P_2 -> template atom representing it
+    counterexample_template_atoms : dict
+    refinement_rules : list
+    refinement_weight_rules : list
+    #rule index -> number of refinement atoms in the positive body of the rule
+    rule_triggers : list
+    #template atom -> indices of rules having the atom in their triggers
+    watched_rules : dict
+    #indices of rules without triggers
+    base_rules : list
+    added_rules : int
+    #when not empty every refinement is guarded by the external activation_atom_name(iteration) (initially true)
+    activation_atom_name : str
+
+    def __init__(self, original_programs, program_c, program_neg_c, ground_transformation, ctl_target=None, context_program="", counterexample_domain=None):
+        self.original_programs_list = original_programs
+        self.rewritten_programs_list = []
+        #the template is always rewritten over the non-ground signature, the counterexample is applied on the ground rules
+        self.textual_rewriter = RefinementNoWeakRewriter(original_programs, program_c, program_neg_c, False)
+        self.ctl_target = ctl_target
+        self.context_program = context_program
+        self.counterexample_domain = counterexample_domain if not counterexample_domain is None else []
+        self.observer = RefinementObserver()
+        self.supported = True
+        self.atom_kind = dict()
+        self.shared_atoms = dict()
+        self.counterexample_atoms = dict()
+        self.iteration_atoms = dict()
+        self.shared_literals = None
+        self.counterexample_template_atoms = dict()
+        self.refinement_rules = []
+        self.refinement_weight_rules = []
+        self.rule_triggers = []
+        self.watched_rules = dict()
+        self.base_rules = []
+        self.added_rules = 0
+        self.activation_atom_name = ""
+
+    def compute_placeholder_program(self):
+        self.textual_rewriter.compute_placeholder_program()
+        self.textual_rewriter.rewrite([], self.TEMPLATE_ITERATION)
+        template_program = self.textual_rewriter.refined_program()
+
+        reduct_rewriter = self.textual_rewriter.reduct_rewriter
+        iteration = str(self.TEMPLATE_ITERATION)
+        #predicate names introduced by the refinement of the template iteration -> prefix of the same predicate in other iterations
+        iteration_prefixes = dict()
+        for pred in set(reduct_rewriter.suffix_p_literals.values()) | set(self.textual_rewriter.constraint_program_rewriter.suffix_p_literals.values()):
+            iteration_prefixes[f"{pred}{self.SUFFIX_P}{iteration}"] = f"{pred}{self.SUFFIX_P}"
+        iteration_prefixes[f"{self.FAIL_ATOM_NAME}{iteration}"] = self.FAIL_ATOM_NAME
+        counterexample_names = dict()
+        for pred in reduct_rewriter.suffix_n_literals.values():
+            counterexample_names[f"{pred}{self.SUFFIX_N}{iteration}"] = pred
+
+        #counterexample atoms are left open so that the template covers every possible counterexample
+        externals = []
+        for symbol in self.counterexample_domain:
+            if symbol.name in self.original_programs_list[0].head_predicates:
+                template_name = f"{symbol.name}{self.SUFFIX_N}{iteration}"
+                if template_name in counterexample_names:
+                    externals.append(f"#external {clingo.Function(template_name, symbol.arguments, symbol.positive)}.")
+
+        ctl_template = clingo.Control(logger=ClingoLogger().log)
+        ctl_template.register_observer(self.observer)
+        ctl_template.add(self.context_program)
+        ctl_template.add("\n".join(externals))
+        ctl_template.add(template_program)
+        ctl_template.ground()
+        self.supported = self.observer.supported
+
+        for atom in ctl_template.symbolic_atoms:
+            symbol = atom.symbol
+            if symbol.name in iteration_prefixes:
+                self.atom_kind[atom.literal] = self.ITERATION_ATOM
+                self.iteration_atoms[atom.literal] = (iteration_prefixes[symbol.name], symbol.arguments, symbol.positive)
+            elif symbol.name in counterexample_names:
+                self.atom_kind[atom.literal] = self.COUNTEREXAMPLE_ATOM
+                self.counterexample_atoms[atom.literal] = clingo.Function(counterexample_names[symbol.name], symbol.arguments, symbol.positive)
+                self.counterexample_template_atoms[self.counterexample_atoms[atom.literal]] = atom.literal
+            else:
+                self.atom_kind[atom.literal] = self.SHARED_ATOM
+                self.shared_atoms[atom.literal] = symbol
+
+        #keep only the rules produced by the refinement (context rules are already in the target control)
+        for (choice, head, body) in self.observer.rules:
+            if self.is_refinement_rule(choice, head, [abs(lit) for lit in body]):
+                self.refinement_rules.append((choice, head, body))
+        for (choice, head, lower_bound, body) in self.observer.weight_rules:
+            if self.is_refinement_rule(choice, head, [abs(lit) for (lit, _) in body]):
+                self.refinement_weight_rules.append((choice, head, lower_bound, body))
+        self.observer = None
+
+        #a rule can fire only after all the refinement atoms in its positive body are derived
+        for (choice, head, body) in self.refinement_rules:
+            triggers = set(lit for lit in body if lit > 0 and self.kind(lit) != self.SHARED_ATOM)
+            for atom in triggers:
+                self.watched_rules.setdefault(atom, []).append(len(self.rule_triggers))
+            if len(triggers) == 0:
+                self.base_rules.append(len(self.rule_triggers))
+            self.rule_triggers.append(len(triggers))
+
+    def is_refinement_rule(self, choice, head, body_atoms):
+        if len(head) > 0:
+            return any(self.kind(atom) == self.ITERATION_ATOM for atom in head)
+        if choice:
+            return False
+        return any(self.kind(atom) != self.SHARED_ATOM for atom in body_atoms)
+
+    #atoms without a symbol are auxiliary atoms of the refinement
+    def kind(self, atom):
+        return self.atom_kind.get(atom, self.ITERATION_ATOM)
+
+    def resolve_shared_literals(self):
+        self.shared_literals = dict()
+        for atom, symbol in self.shared_atoms.items():
+            target_atom = self.ctl_target.symbolic_atoms[symbol]
+            #atoms not appearing in the target control are false
+            self.shared_literals[atom] = target_atom.literal if not target_atom is None else None
+
+    #computes the rules that can fire for the given counterexample together with the atoms they possibly derive
+    #(the same simplification the grounder would do if counterexample atoms were facts)
+    def derivable_rules(self, counterexample):
+        derived = set()
+        missing_triggers = dict()
+        queue = list(self.base_rules)
+
+        def derive(atom):
+            if atom in derived:
+                return
+            derived.add(atom)
+            for rule_index in self.watched_rules.get(atom, []):
+                missing = missing_triggers.get(rule_index, self.rule_triggers[rule_index]) - 1
+                missing_triggers[rule_index] = missing
+                if missing == 0:
+                    queue.append(rule_index)
+
+        for symbol in counterexample:
+            atom = self.counterexample_template_atoms.get(symbol)
+            if not atom is None:
+                derive(atom)
+        #weight rules are not simplified - their heads are always possibly derived
+        for (_, head, _, _) in self.refinement_weight_rules:
+            for atom in head:
+                derive(atom)
+
+        alive_rules = []
+        while len(queue) > 0:
+            rule_index = queue.pop()
+            (_, head, body) = self.refinement_rules[rule_index]
+            #rule is removed if a counterexample atom under negation is true
+            if any(lit < 0 and self.kind(-lit) == self.COUNTEREXAMPLE_ATOM and -lit in derived for lit in body):
+                continue
+            alive_rules.append(rule_index)
+            for atom in head:
+                derive(atom)
+        alive_rules.sort()
+        return (alive_rules, derived)
+
+    #returns the literal in the target control or None if the literal is true (a false literal is never translated)
+    def translate(self, literal, derived, renamed_atoms, backend, iteration):
+        atom = abs(literal)
+        kind = self.kind(atom)
+        if kind == self.SHARED_ATOM:
+            target_literal = self.shared_literals[atom]
+            return target_literal if literal > 0 else -target_literal
+        #atoms that cannot be derived are false
+        if kind == self.COUNTEREXAMPLE_ATOM or not atom in derived:
+            return None
+        target_atom = renamed_atoms.get(atom)
+        if target_atom is None:
+            renamed = self.iteration_atoms.get(atom)
+            if renamed is None:
+                target_atom = backend.add_atom()
+            else:
+                (prefix, arguments, positive) = renamed
+                target_atom = backend.add_atom(clingo.Function(f"{prefix}{iteration}", arguments, positive))
+            renamed_atoms[atom] = target_atom
+        return target_atom if literal > 0 else -target_atom
+
+    #truth value of a literal that is not translated in the target control
+    def constant_value(self, literal, derived):
+        atom = abs(literal)
+        kind = self.kind(atom)
+        if kind == self.SHARED_ATOM:
+            #shared atoms that do not appear in the target control are false
+            if self.shared_literals[atom] is None:
+                return literal < 0
+            return None
+        if kind == self.COUNTEREXAMPLE_ATOM or not atom in derived:
+            return (atom in derived) == (literal > 0)
+        return None
+
+    def rewrite(self, counterexample, iteration):
+        if self.shared_literals is None:
+            self.resolve_shared_literals()
+        (alive_rules, derived) = self.derivable_rules(counterexample)
+        renamed_atoms = dict()
+        self.added_rules = 0
+        with self.ctl_target.backend() as backend:
+            activation = []
+            if self.activation_atom_name != "":
+                activation_atom = backend.add_atom(clingo.Function(self.activation_atom_name, [clingo.Number(iteration)]))
+                backend.add_external(activation_atom, clingo.TruthValue.True_)
+                activation = [activation_atom]
+            for rule_index in alive_rules:
+                (choice, head, body) = self.refinement_rules[rule_index]
+                new_body = []
+                satisfiable_body = True
+                for literal in body:
+                    value = self.constant_value(literal, derived)
+                    if value is None:
+                        new_body.append(self.translate(literal, derived, renamed_atoms, backend, iteration))
+                    elif not value:
+                        satisfiable_body = False
+                        break
+                if not satisfiable_body:
+                    continue
+                new_head = [self.translate(atom, derived, renamed_atoms, backend, iteration) for atom in head]
+                backend.add_rule(new_head, new_body + activation, choice)
+                self.added_rules += 1
+
+            for (choice, head, lower_bound, body) in self.refinement_weight_rules:
+                new_body = []
+                for (literal, weight) in body:
+                    value = self.constant_value(literal, derived)
+                    if value is None:
+                        new_body.append((self.translate(literal, derived, renamed_atoms, backend, iteration), weight))
+                    elif value:
+                        lower_bound -= weight
+                new_head = [self.translate(atom, derived, renamed_atoms, backend, iteration) for atom in head]
+                if len(activation) > 0:
+                    #the weight body is moved to an auxiliary atom so that the rule can be guarded
+                    body_atom = backend.add_atom()
+                    backend.add_weight_rule([body_atom], lower_bound, new_body)
+                    backend.add_rule(new_head, [body_atom, *activation], choice)
+                else:
+                    backend.add_weight_rule(new_head, lower_bound, new_body, choice)
+                self.added_rules += 1
+
+    #the refinement is added directly to the target control
+    def refined_program(self):
+        return None
@@ -0,0 +1,39 @@
+# Copyright [2025] [Andrea Cuteri, Giuseppe Mazzotta and Francesco Ricca]
+
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+
+#        http://www.apache.org/licenses/LICENSE-2.0
+
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+import sys
+
+#buffered stream receiving the printed models - every model is written with a single call
+#the stream is flushed every flush_models models (if zero it is left to the buffering of the stream)
+class ModelOutput:
+    #None stands for the current standard output (which is redirected when solving in batch and portfolio mode)
+    stream : object
+    flush_models : int
+    pending_models : int
+
+    def __init__(self, path="", flush_models=0):
+        self.stream = None if path == "" else open(path, "w")
+        self.flush_models = flush_models
+        self.pending_models = 0
+
+    def write(self, model):
+        stream = sys.stdout if self.stream is None else self.stream
+        stream.write(model)
+        self.pending_models += 1
+        if self.flush_models > 0 and self.pending_models >= self.flush_models:
+            stream.flush()
+            self.pending_models = 0
+
+    def flush(self):
+        (sys.stdout if self.stream is None else self.stream).flush()
+        self.pending_models = 0
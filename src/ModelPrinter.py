@@ -13,9 +13,15 @@
 #    limitations under the License.
 from abc import abstractmethod
 
+from .ModelOutput import ModelOutput
+
 
 class ModelPrinter:
+    output : ModelOutput
+
+    def __init__(self, output):
+        self.output = output
     
     @abstractmethod
     def print_model(self, model, p1_symbols):
-        pass
\ No newline at end of file
+        pass
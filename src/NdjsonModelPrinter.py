@@ -0,0 +1,24 @@
+# Copyright [2025] [Andrea Cuteri, Giuseppe Mazzotta and Francesco Ricca]
+
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+
+#        http://www.apache.org/licenses/LICENSE-2.0
+
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+import json
+
+from .ModelPrinter import ModelPrinter
+
+#compact json line per model with the true output atoms only
+class NdjsonModelPrinter(ModelPrinter):
+    def __init__(self, output):
+        super().__init__(output)
+
+    def print_model(self, model, p1_symbols):
+        self.output.write(json.dumps({"model" : [str(symbol) for symbol in model if symbol in p1_symbols]}, separators=(",", ":")) + "\n")
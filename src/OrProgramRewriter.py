@@ -29,6 +29,10 @@ class OrProgramRewriter(clingo.ast.Transformer):
     unsat_atom_name : str
     suffix_p_literals : dict
     unsat_literals : dict
+    #when set, predicates are written over their final signature with the iteration as last term (instead of annotations)
+    template_mode : bool
+    template_suffix_p : str
+    iteration_parameter : str
 
     def __init__(self, to_rewrite_predicates, unsat_atom_name, rewrite_program_predicates, program, negated = True):
         if rewrite_program_predicates:
@@ -43,6 +47,9 @@ class OrProgramRewriter(clingo.ast.Transformer):
         self.suffix_p_literals = dict()
         self.unsat_literals = dict()
         self.unsat_atom_name = unsat_atom_name
+        self.template_mode = False
+        self.template_suffix_p = ""
+        self.iteration_parameter = ""
 
     def rewrite(self, suffix_p, iteration):
         if self.placeholder_program == "":
@@ -61,14 +68,28 @@ class OrProgramRewriter(clingo.ast.Transformer):
             else:
                 self.rewritten_program = self.pattern_fail.sub(lambda a : self.unsat_literals[a.group(0)], self.rewritten_program)
 
+    def iteration_term(self, location):
+        return clingo.ast.Function(location, self.iteration_parameter, [], False)
+
+    def function_p(self, location, name, arguments):
+        if self.template_mode:
+            return clingo.ast.Function(location, f"{name}{self.template_suffix_p}", [*arguments, self.iteration_term(location)], False)
+        self.suffix_p_literals[self.ANNOTATION_OPEN_P + name + self.ANNOTATION_CLOSE_P] = name
+        return clingo.ast.Function(location, self.ANNOTATION_OPEN_P + name + self.ANNOTATION_CLOSE_P, arguments, False)
+
+    def function_unsat(self, location):
+        if self.template_mode:
+            return clingo.ast.Function(location, self.unsat_atom_name, [self.iteration_term(location)], False)
+        self.unsat_literals[self.ANNOTATION_OPEN_F + self.unsat_atom_name + self.ANNOTATION_CLOSE_F] = self.unsat_atom_name
+        return clingo.ast.Function(location, self.ANNOTATION_OPEN_F + self.unsat_atom_name + self.ANNOTATION_CLOSE_F, [], False)
+
     def visit_Rule(self, node):
         rewritten_body = []
         new_head = node.head
         if not node.head.atom.ast_type == clingo.ast.ASTType.BooleanConstant:
             if node.head.ast_type == clingo.ast.ASTType.Literal:
                 if node.head.atom.symbol.name in self.rewrite_predicates:
-                    self.suffix_p_literals[self.ANNOTATION_OPEN_P + node.head.atom.symbol.name + self.ANNOTATION_CLOSE_P]  = node.head.atom.symbol.name #self.suffix_p
-                    new_term = clingo.ast.Function(node.location, self.ANNOTATION_OPEN_P + node.head.atom.symbol.name + self.ANNOTATION_CLOSE_P, node.head.atom.symbol.arguments, False)
+                    new_term = self.function_p(node.location, node.head.atom.symbol.name, node.head.atom.symbol.arguments)
                     new_head = clingo.ast.SymbolicAtom(new_term)
             else:
                 raise Exception("Not supported head")
@@ -85,9 +106,7 @@ class OrProgramRewriter(clingo.ast.Transformer):
                                 if condition.ast_type == clingo.ast.ASTType.Literal:
                                     if not condition.atom is None:
                                         if condition.atom.symbol.name in self.rewrite_predicates:
-
-                                            self.suffix_p_literals[self.ANNOTATION_OPEN_P + condition.atom.symbol.name + self.ANNOTATION_CLOSE_P] = condition.atom.symbol.name
-                                            new_term = clingo.ast.Function(condition.location, self.ANNOTATION_OPEN_P + condition.atom.symbol.name + self.ANNOTATION_CLOSE_P, condition.atom.symbol.arguments, False)
+                                            new_term = self.function_p(condition.location, condition.atom.symbol.name, condition.atom.symbol.arguments)
                                             new_atom = clingo.ast.SymbolicAtom(new_term)
                                             new_literal = clingo.ast.Literal(condition.location, condition.sign, new_atom)
                                             new_condition.append(new_literal)
@@ -102,8 +121,7 @@ class OrProgramRewriter(clingo.ast.Transformer):
                     else:
                         #lit is defined in P2
                         if elem.atom.ast_type == clingo.ast.ASTType.SymbolicAtom and elem.atom.symbol.name in self.rewrite_predicates:
-                            self.suffix_p_literals[self.ANNOTATION_OPEN_P + elem.atom.symbol.name + self.ANNOTATION_CLOSE_P] = elem.atom.symbol.name #suffix p
-                            new_term = clingo.ast.Function(node.location, self.ANNOTATION_OPEN_P + elem.atom.symbol.name + self.ANNOTATION_CLOSE_P, elem.atom.symbol.arguments, False)
+                            new_term = self.function_p(node.location, elem.atom.symbol.name, elem.atom.symbol.arguments)
                             new_atom = clingo.ast.SymbolicAtom(new_term)
                             new_literal = clingo.ast.Literal(node.location, elem.sign, new_atom)
                             rewritten_body.append(new_literal)
@@ -113,8 +131,7 @@ class OrProgramRewriter(clingo.ast.Transformer):
                     raise Exception("body atom is None")
             else:
                 rewritten_body.append(elem)
-        self.unsat_literals[self.ANNOTATION_OPEN_F + self.unsat_atom_name + self.ANNOTATION_CLOSE_F] = self.unsat_atom_name #fail
-        fail_func = clingo.ast.Function(node.location, self.ANNOTATION_OPEN_F + self.unsat_atom_name + self.ANNOTATION_CLOSE_F, [], False)
+        fail_func = self.function_unsat(node.location)
         fail_lit = clingo.ast.Literal(node.location, clingo.ast.Sign.Negation if self.unsat_atom_name_sign else clingo.ast.Sign.NoSign, clingo.ast.SymbolicAtom(fail_func))
         rewritten_body.append(fail_lit)
 
@@ -128,4 +145,16 @@ class OrProgramRewriter(clingo.ast.Transformer):
         self.placeholder_program = "\n".join(self.placeholder_program_rules)
         self.placeholder_program_rules = []
         self.pattern_suffix_p = re.compile('|'.join(re.escape(k) for k in self.suffix_p_literals))
-        self.pattern_fail = re.compile('|'.join(re.escape(k) for k in self.unsat_literals))
\ No newline at end of file
+        self.pattern_fail = re.compile('|'.join(re.escape(k) for k in self.unsat_literals))
+
+    #template program is grounded once per refinement with the iteration given as value of iteration_parameter
+    def compute_template_program(self, suffix_p, iteration_parameter):
+        self.template_mode = True
+        self.template_suffix_p = suffix_p
+        self.iteration_parameter = iteration_parameter
+        self.placeholder_program_rules = []
+        parse_string(self.program.rules, lambda stm: (self(stm)))
+        template_program = "\n".join(self.placeholder_program_rules)
+        self.placeholder_program_rules = []
+        self.template_mode = False
+        return template_program
@@ -0,0 +1,89 @@
+# Copyright [2025] [Andrea Cuteri, Giuseppe Mazzotta and Francesco Ricca]
+
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+
+#        http://www.apache.org/licenses/LICENSE-2.0
+
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+import argparse
+import contextlib
+import io
+import itertools
+import logging
+import multiprocessing
+import queue
+import signal
+
+
+#workers are terminated by the portfolio and interrupts are handled by the main process only
+def _init_worker():
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+#runs one configuration of the portfolio and returns its exit code together with everything it printed
+def _run_configuration(solve, encoding_program, instance_program, configuration):
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        try:
+            exit_code = solve(encoding_program, instance_program, configuration)
+        except SystemExit as e:
+            exit_code = e.code
+    return (exit_code, output.getvalue())
+
+#runs differently configured solvers in a process pool - the first configuration that terminates with a result
+#gives it (every configuration computes the same answer, i.e. SAT/UNSAT or the optimum) and the others are killed
+class Portfolio:
+    HEURISTICS : list = ["", "Berkmin", "Vmtf"]
+    #exit codes of configurations that computed the answer (SAT, UNSAT, optimum)
+    RESULT_EXIT_CODES : set = {10, 20, 30}
+
+    solve : object
+    configurations : list
+
+    def __init__(self, solve, args, size):
+        self.solve = solve
+        self.configurations = []
+        #the first configuration is the one given on the command line, the following ones first vary the
+        #refinement mode, then the ground transformation and the clingo heuristic
+        #the global weak strategy is never varied since it changes the output of the solver
+        variants = itertools.product(self.HEURISTICS, [args.ground_transformation, not args.ground_transformation], [args.ground_refinement, not args.ground_refinement])
+        for (heuristic, ground_transformation, ground_refinement) in itertools.islice(variants, size):
+            configuration = argparse.Namespace(**vars(args))
+            configuration.heuristic = heuristic
+            configuration.ground_transformation = ground_transformation
+            configuration.ground_refinement = ground_refinement
+            configuration.portfolio = 1
+            self.configurations.append(configuration)
+
+    def run(self, encoding_program, instance_program):
+        logger = logging.getLogger("Casper")
+        #(index of the configuration, result, error) in order of termination
+        terminated = queue.Queue()
+        #result of the first configuration that exited without an answer, reported if no configuration computes one
+        failed_result = None
+        #leaving the with statement terminates the configurations that are still running
+        with multiprocessing.Pool(len(self.configurations), initializer=_init_worker) as pool:
+            for i in range(len(self.configurations)):
+                pool.apply_async(_run_configuration, (self.solve, encoding_program, instance_program, self.configurations[i]),
+                    callback=lambda result, i=i: terminated.put((i, result, None)),
+                    error_callback=lambda error, i=i: terminated.put((i, None, error)))
+            for _ in range(len(self.configurations)):
+                (i, result, error) = terminated.get()
+                if error is None and result[0] in self.RESULT_EXIT_CODES:
+                    logger.debug("Portfolio configuration %d terminated first: %s", i, vars(self.configurations[i]))
+                    return result
+                if error is None:
+                    logger.debug("Portfolio configuration %d exited with code %s", i, result[0])
+                    if failed_result is None:
+                        failed_result = result
+                else:
+                    logger.debug("Portfolio configuration %d failed: %s", i, error)
+        if not failed_result is None:
+            return failed_result
+        raise Exception("No configuration of the portfolio terminated")
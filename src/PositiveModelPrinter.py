@@ -14,12 +14,8 @@
 from .ModelPrinter import ModelPrinter
 
 class PositiveModelPrinter(ModelPrinter):
-    def __init__(self):
-        pass
+    def __init__(self, output):
+        super().__init__(output)
 
     def print_model(self, model, p1_symbols):
-        print("Model:{", end="")
-        for symbol in model:
-            if symbol in p1_symbols:
-                print(f"{symbol}.",end=" ")
-        print("}")
\ No newline at end of file
+        self.output.write("Model:{" + "".join(f"{symbol}. " for symbol in model if symbol in p1_symbols) + "}\n")
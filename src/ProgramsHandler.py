@@ -11,6 +11,7 @@
 #    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
+import copy
 from clingo.ast import parse_string
 from .FlipConstraintRewriter import FlipConstraintRewriter
 from .QuantifiedProgram import QuantifiedProgram, ProgramQuantifier
@@ -28,6 +29,8 @@ class ProgramsHandler:
     flipped_constraint : QuantifiedProgram
     global_weak_program : QuantifiedProgram
     program_type : ASPQType
+    #objects computed from the programs only (e.g. rewriters with their placeholder programs), shared by copies with other instances
+    cache : dict
 
     def flip_constraint(self):
         flipConstraintRewriter = FlipConstraintRewriter(f"{self.FLIP_CONSTRAINT_PREDICATE_NAME}{len(self.programs_list)}")
@@ -59,10 +62,22 @@ class ProgramsHandler:
         self.instance = instance
         self.flipped_constraint = None
         self.global_weak_program = global_weak_program
+        self.cache = dict()
         self.compute_program_type()
         #add empty constraint program if no constraint program was parsed
         self.flip_constraint()
 
+    #same programs with a different instance (constraints are not flipped again)
+    def with_instance(self, instance):
+        programs_handler = copy.copy(self)
+        programs_handler.instance = instance
+        return programs_handler
+
+    def cached(self, key, compute):
+        if not key in self.cache:
+            self.cache[key] = compute()
+        return self.cache[key]
+
     def check_aspq_type(self):
         if len(self.programs_list) > 3:
             for program in self.programs_list:
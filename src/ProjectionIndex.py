@@ -0,0 +1,113 @@
+# Copyright [2025] [Andrea Cuteri, Giuseppe Mazzotta and Francesco Ricca]
+
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+
+#        http://www.apache.org/licenses/LICENSE-2.0
+
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+#index of the atoms of P_1 in ctl move, built while grounding (and extended with the atoms of extensions)
+#the truth values of the current candidate are stored once per candidate, then assumptions, blocking nogoods
+#and the projection on the output symbols are read from them
+class ProjectionIndex:
+    #symbol -> position of the atoms of P_1 (in order of grounding)
+    positions : dict
+    symbols : list
+    #program literals of the atoms in ctl move (0 for atoms that clingo already fixed to false)
+    literals : list
+    #output symbol -> position
+    output_positions : dict
+    #truth values of the atoms in the current candidate
+    values : list
+    #positions and literals of the atoms in ctl countermove, resolved once for every atom
+    #atoms that are not in ctl countermove are skipped (symbolic assumptions on them would be ignored)
+    countermove_positions : list
+    countermove_literals : list
+    countermove_resolved : int
+
+    def __init__(self):
+        self.positions = dict()
+        self.symbols = []
+        self.literals = []
+        self.output_positions = dict()
+        self.values = []
+        self.countermove_positions = []
+        self.countermove_literals = []
+        self.countermove_resolved = 0
+
+    #returns False if the symbol was already indexed
+    def add(self, symbol, literal, output):
+        if symbol in self.positions:
+            return False
+        self.positions[symbol] = len(self.symbols)
+        if output:
+            self.output_positions[symbol] = len(self.symbols)
+        self.symbols.append(symbol)
+        self.literals.append(literal)
+        self.values.append(False)
+        return True
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __contains__(self, symbol):
+        return symbol in self.positions
+
+    #the candidate is a model of ctl move
+    def set_model(self, model):
+        self.values = self.model_values(model)
+
+    #Model.is_true(0) is true, while an atom with literal 0 is constantly false
+    def model_values(self, model):
+        is_true = model.is_true
+        return [literal != 0 and is_true(literal) for literal in self.literals]
+
+    #the candidate is given by its symbols (computed by another control)
+    def set_candidate(self, candidate):
+        values = [False] * len(self.symbols)
+        positions = self.positions
+        for symbol in candidate:
+            position = positions.get(symbol)
+            if not position is None:
+                values[position] = True
+        self.values = values
+
+    def assumptions(self):
+        return list(zip(self.symbols, self.values))
+
+    #resolves the atoms indexed after the last call
+    def resolve_countermove_literals(self, symbolic_atoms):
+        for position in range(self.countermove_resolved, len(self.symbols)):
+            atom = symbolic_atoms[self.symbols[position]]
+            #atoms fixed to false in ctl countermove (removed from the domain or with literal 0) cannot be assumed
+            if not atom is None and atom.literal != 0:
+                self.countermove_positions.append(position)
+                self.countermove_literals.append(atom.literal)
+        self.countermove_resolved = len(self.symbols)
+
+    #assumptions fixing the current candidate (or the given one) in ctl countermove (or in a copy with the given literals)
+    def countermove_assumptions(self, values=None, literals=None):
+        values = self.values if values is None else values
+        literals = self.countermove_literals if literals is None else literals
+        return [literal if values[position] else -literal for (position, literal) in zip(self.countermove_positions, literals)]
+
+    #atoms fixed to false have the same value in every model and are left out of projections and blocking constraints
+    def output_literals(self):
+        return [self.literals[position] for position in self.output_positions.values() if self.literals[position] != 0]
+
+    #nogood over the output literals excluding the projection of the current candidate
+    def blocking_nogood(self):
+        literals = self.literals
+        values = self.values
+        return [literals[position] if values[position] else -literals[position] for position in self.output_positions.values() if literals[position] != 0]
+
+    def blocking_constraint(self):
+        literals = self.literals
+        values = self.values
+        return ":-" + ",".join(str(symbol) if values[position] else f"not {symbol}" for (symbol, position) in self.output_positions.items() if literals[position] != 0) + "."
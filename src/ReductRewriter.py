@@ -43,6 +43,10 @@ class ReductRewriter(clingo.ast.Transformer):
     parsing_first_program: bool
     to_rewrite_predicates : set
     current_fail_predicate : str
+    #when set, predicates are written over their final signature with the iteration as last term (instead of annotations)
+    template_mode : bool
+    iteration_parameter : str
+    template_programs_list_rules : list
 
     def __init__(self, original_programs, suffix_p, suffix_n, fail_atom_name, ground_transformation):
         self.original_programs_list = original_programs
@@ -59,6 +63,9 @@ class ReductRewriter(clingo.ast.Transformer):
         self.fail_literals = dict()
         self.to_rewrite_predicates = set()
         self.current_fail_predicate = ""
+        self.template_mode = False
+        self.iteration_parameter = ""
+        self.template_programs_list_rules = []
         #refine
         for i in range(len(self.original_programs_list)):
             self.to_rewrite_predicates = self.to_rewrite_predicates | self.original_programs_list[i].head_predicates
@@ -143,6 +150,27 @@ class ReductRewriter(clingo.ast.Transformer):
         #add counterexample facts in the first exists program
         self.rewritten_programs_list[0].rules += self.counterexample_facts
 
+    def iteration_term(self, location):
+        return clingo.ast.Function(location, self.iteration_parameter, [], False)
+
+    def function_p(self, location, name, arguments):
+        if self.template_mode:
+            return clingo.ast.Function(location, f"{name}{self.suffix_p}", [*arguments, self.iteration_term(location)], False)
+        self.suffix_p_literals[self.ANNOTATION_OPEN_P + name + self.ANNOTATION_CLOSE_P] = name
+        return clingo.ast.Function(location, self.ANNOTATION_OPEN_P + name + self.ANNOTATION_CLOSE_P, arguments, False)
+
+    def function_n(self, location, name, arguments):
+        if self.template_mode:
+            return clingo.ast.Function(location, f"{name}{self.suffix_n}", [*arguments, self.iteration_term(location)], False)
+        self.suffix_n_literals[self.ANNOTATION_OPEN_N + name + self.ANNOTATION_CLOSE_N] = name
+        return clingo.ast.Function(location, self.ANNOTATION_OPEN_N + name + self.ANNOTATION_CLOSE_N, arguments, False)
+
+    def function_fail(self, location):
+        if self.template_mode:
+            return clingo.ast.Function(location, self.fail_atom_name, [self.iteration_term(location)], False)
+        self.fail_literals[self.ANNOTATION_OPEN_F + self.fail_atom_name + self.ANNOTATION_CLOSE_F] = self.fail_atom_name
+        return clingo.ast.Function(location, self.ANNOTATION_OPEN_F + self.fail_atom_name + self.ANNOTATION_CLOSE_F, [], False)
+
     def visit_Rule(self, node):
         rewritten_body = []
         new_head = None
@@ -159,11 +187,9 @@ class ReductRewriter(clingo.ast.Transformer):
                                     if not condition.atom is None:
                                         if condition.atom.symbol.name in self.original_programs_list[0].head_predicates:
                                             if condition.sign:
-                                                self.suffix_n_literals[self.ANNOTATION_OPEN_N + condition.atom.symbol.name + self.ANNOTATION_CLOSE_N] = condition.atom.symbol.name
-                                                new_term = clingo.ast.Function(condition.location, self.ANNOTATION_OPEN_N + condition.atom.symbol.name + self.ANNOTATION_CLOSE_N)
+                                                new_term = self.function_n(condition.location, condition.atom.symbol.name, condition.atom.symbol.arguments)
                                             else:
-                                                self.suffix_p_literals[self.ANNOTATION_OPEN_P + condition.atom.symbol.name + self.ANNOTATION_CLOSE_P] = condition.atom.symbol.name
-                                                new_term = clingo.ast.Function(condition.location, self.ANNOTATION_OPEN_P + condition.atom.symbol.name + self.ANNOTATION_CLOSE_P)
+                                                new_term = self.function_p(condition.location, condition.atom.symbol.name, condition.atom.symbol.arguments)
                                             new_atom = clingo.ast.SymbolicAtom(new_term)
                                             new_literal = clingo.ast.Literal(condition.location, condition.sign, new_atom)
                                             new_condition.append(new_literal)
@@ -185,8 +211,7 @@ class ReductRewriter(clingo.ast.Transformer):
                         if not self.parsing_first_program:
                             #if predicate is defined in some program rewrite it on the + signature, otherwise leave it unchanged
                             if elem.atom.symbol.name in self.to_rewrite_predicates:
-                                self.suffix_p_literals[self.ANNOTATION_OPEN_P + elem.atom.symbol.name + self.ANNOTATION_CLOSE_P] = elem.atom.symbol.name #self.suffix_p
-                                new_term = clingo.ast.Function(node.location, self.ANNOTATION_OPEN_P + elem.atom.symbol.name + self.ANNOTATION_CLOSE_P, elem.atom.symbol.arguments, False)                                
+                                new_term = self.function_p(node.location, elem.atom.symbol.name, elem.atom.symbol.arguments)
                                 new_atom = clingo.ast.SymbolicAtom(new_term)
                                 new_literal = clingo.ast.Literal(node.location, elem.sign, new_atom)
                                 rewritten_body.append(new_literal)
@@ -197,11 +222,9 @@ class ReductRewriter(clingo.ast.Transformer):
                             #if predicate is defined in the program for which I am writing the reduct, map it to the + and - signatures
                             if elem.atom.symbol.name in self.original_programs_list[0].head_predicates:
                                 if elem.sign:
-                                    self.suffix_n_literals[self.ANNOTATION_OPEN_N + elem.atom.symbol.name + self.ANNOTATION_CLOSE_N] = elem.atom.symbol.name #self.suffix_n
-                                    new_term = clingo.ast.Function(node.location, self.ANNOTATION_OPEN_N + elem.atom.symbol.name + self.ANNOTATION_CLOSE_N, elem.atom.symbol.arguments, False)
+                                    new_term = self.function_n(node.location, elem.atom.symbol.name, elem.atom.symbol.arguments)
                                 else:
-                                    self.suffix_p_literals[self.ANNOTATION_OPEN_P + elem.atom.symbol.name + self.ANNOTATION_CLOSE_P] = elem.atom.symbol.name #self.suffix_p
-                                    new_term = clingo.ast.Function(node.location, self.ANNOTATION_OPEN_P + elem.atom.symbol.name + self.ANNOTATION_CLOSE_P, elem.atom.symbol.arguments, False)
+                                    new_term = self.function_p(node.location, elem.atom.symbol.name, elem.atom.symbol.arguments)
 
                                 new_atom = clingo.ast.SymbolicAtom(new_term)
                                 new_literal = clingo.ast.Literal(node.location, elem.sign, new_atom)
@@ -217,27 +240,23 @@ class ReductRewriter(clingo.ast.Transformer):
                 
         #disable all programs after the program for which I compute the reduct
         if not self.parsing_first_program:
-            self.fail_literals[self.ANNOTATION_OPEN_F + self.fail_atom_name + self.ANNOTATION_CLOSE_F] = self.fail_atom_name #fail
-            fail_func = clingo.ast.Function(node.location, self.ANNOTATION_OPEN_F + self.fail_atom_name + self.ANNOTATION_CLOSE_F, [], False)
+            fail_func = self.function_fail(node.location)
             fail_lit = clingo.ast.Literal(node.location, clingo.ast.Sign.Negation, clingo.ast.SymbolicAtom(fail_func))
             rewritten_body.append(fail_lit)
 
         if node.head.atom.ast_type != clingo.ast.ASTType.BooleanConstant:
-            self.suffix_p_literals[self.ANNOTATION_OPEN_P + node.head.atom.symbol.name + self.ANNOTATION_CLOSE_P] = node.head.atom.symbol.name #self.suffix_p 
-            new_term = clingo.ast.Function(node.location, self.ANNOTATION_OPEN_P + node.head.atom.symbol.name + self.ANNOTATION_CLOSE_P, node.head.atom.symbol.arguments, False)
+            new_term = self.function_p(node.location, node.head.atom.symbol.name, node.head.atom.symbol.arguments)
             new_head = clingo.ast.SymbolicAtom(new_term)
             #add rules of the form fail :-l+, not l-. and fail :-l-, not l+.  
             if self.parsing_first_program:
                 try:
                     #add fail :- a_p not a_n for every rule in P2
-                    f_1 = clingo.ast.Function(node.location, self.ANNOTATION_OPEN_P + node.head.atom.symbol.name + self.ANNOTATION_CLOSE_P, node.head.atom.symbol.arguments, False)
+                    f_1 = self.function_p(node.location, node.head.atom.symbol.name, node.head.atom.symbol.arguments)
 
-                    self.suffix_n_literals[self.ANNOTATION_OPEN_N + node.head.atom.symbol.name + self.ANNOTATION_CLOSE_N] = node.head.atom.symbol.name #self.suffix_n
-                    f_2 = clingo.ast.Function(node.location, self.ANNOTATION_OPEN_N + node.head.atom.symbol.name + self.ANNOTATION_CLOSE_N, node.head.atom.symbol.arguments, False)
+                    f_2 = self.function_n(node.location, node.head.atom.symbol.name, node.head.atom.symbol.arguments)
                     l_1 = clingo.ast.Literal(node.location, False, f_1)
                     l_2 = clingo.ast.Literal(node.location, True, f_2)
-                    self.fail_literals[self.ANNOTATION_OPEN_F + self.fail_atom_name + self.ANNOTATION_CLOSE_F] = self.fail_atom_name
-                    fail_head = clingo.ast.Function(node.location, self.ANNOTATION_OPEN_F + self.fail_atom_name + self.ANNOTATION_CLOSE_F, [], False)
+                    fail_head = self.function_fail(node.location)
                     fail_body = [l_1, l_2]
                     self.placeholder_program_rules.append(str(clingo.ast.Rule(node.location, fail_head, fail_body)))
                     
@@ -249,8 +268,7 @@ class ReductRewriter(clingo.ast.Transformer):
                     print("Usupported head")
                     exit(1)
         else: 
-            self.fail_literals[self.ANNOTATION_OPEN_F + self.fail_atom_name + self.ANNOTATION_CLOSE_F] = self.fail_atom_name
-            new_term = clingo.ast.Function(node.location, self.ANNOTATION_OPEN_F + self.fail_atom_name + self.ANNOTATION_CLOSE_F, [], False)
+            new_term = self.function_fail(node.location)
             new_head = clingo.ast.SymbolicAtom(new_term)
 
         self.placeholder_program_rules.append(str(clingo.ast.Rule(node.location, new_head, rewritten_body)))
@@ -279,4 +297,26 @@ class ReductRewriter(clingo.ast.Transformer):
         self.pattern_fail = re.compile('|'.join(re.escape(k) for k in self.fail_literals))
         #one rule per list elem
         if self.ground_transformation:
-            self.pattern_suffix_n_negated = re.compile('not ' + '|not '.join(re.escape(k) for k in self.suffix_n_literals)) 
\ No newline at end of file
+            self.pattern_suffix_n_negated = re.compile('not ' + '|not '.join(re.escape(k) for k in self.suffix_n_literals))
+
+    #template programs are grounded once per refinement with the iteration given as value of iteration_parameter
+    def compute_template_program(self, iteration_parameter):
+        self.template_mode = True
+        self.iteration_parameter = iteration_parameter
+        self.template_programs_list_rules = []
+        for i in range(len(self.original_programs_list)):
+            self.parsing_first_program = True if i == 0 else False
+            self.placeholder_program_rules = []
+            parse_string(self.original_programs_list[i].rules, lambda stm: (self(stm)))
+            self.template_programs_list_rules.append("\n".join(self.placeholder_program_rules))
+        self.placeholder_program_rules = []
+        self.template_mode = False
+
+    #counterexample facts over the signature of the template program
+    def counterexample_template_symbols(self, counterexample, iteration):
+        symbols = []
+        iteration_symbol = clingo.Number(iteration)
+        for symbol in counterexample:
+            if symbol.name in self.original_programs_list[0].head_predicates:
+                symbols.append(clingo.Function(symbol.name + self.suffix_n, [*symbol.arguments, iteration_symbol], symbol.positive))
+        return symbols
@@ -11,6 +11,8 @@
 #    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
+import clingo
+
 from .CostRewriter import CostRewriter
 from .SolverSettings import SolverSettings
 from .QuantifiedProgram import QuantifiedProgram
@@ -22,11 +24,18 @@ class RefinementGlobalWeakRewriter:
     rewritten_program : str
     cost_bound : int
     rewriting_iteration : int
-    placeholder_constraint : str
-    violated_bound_atoms : str
+    #bound constraint grounded once - violations of every level are compared with the bound of the level, that is the
+    #(binary encoded) value of the bound externals of the level, and the levels are compared lexicographically
+    bound_program : str
+    #level -> bound externals of the level
+    bound_externals : dict
     sorted_levels : list
     global_weak_violation_atoms_for_level : dict
     total_cost_for_level : dict
+    #level -> weight of a violation at the level in the bound (violations at a level outweigh all the ones at lower levels)
+    level_scale : dict
+    #level -> sum of the weights of the violations of the last model at the level
+    current_violations : dict
     #external atoms used for activating only the last constraint (used for enumeration of optimal models) 
     # external_atoms : list
     iteration : int
@@ -38,14 +47,16 @@ class RefinementGlobalWeakRewriter:
         self.rewritten_program = ""
         self.cost_bound = 0
         # self.external_atoms = []
-        self.placeholder_constraint = ""
+        self.bound_program = ""
+        self.bound_externals = dict()
         self.rewriting_iteration = 0
         self.sorted_levels = []
         self.global_weak_violation_atoms_for_level = dict()
         self.total_cost_for_level = dict()
+        self.level_scale = dict()
+        self.current_violations = dict()
         self.iteration = 0
-        self.violated_bound_atoms = []
-        self.current_violated_bound_atom_name  = ""
+        self.current_violated_bound_atom_name  = SolverSettings.GLOBAL_WEAK_VIOLATED_BOUND_ATOM_NAME
 
     def compute_placeholder_program(self, symbolic_atoms):
         for atom in symbolic_atoms:
@@ -58,34 +69,56 @@ class RefinementGlobalWeakRewriter:
                     self.global_weak_violation_atoms_for_level[level] = [(atom.symbol, negated)]
         prev_sum = 1
         levels = sorted([lev for lev in self.global_weak_violation_atoms_for_level])
-        ground_set = []
+        self.bound_externals = dict()
+        self.bound_program = ""
         for lev in levels:
+            self.level_scale[lev] = prev_sum
             current_cost = 1
+            level_set = []
+            level_weight = 0
             for (symbol,negated) in self.global_weak_violation_atoms_for_level[lev]:
                 tuple_weight = int(str(symbol.arguments[0]))
                 tuple_weight = tuple_weight if tuple_weight >= 0 else -tuple_weight
-                weight = prev_sum * tuple_weight 
-                current_cost += weight
-                tuple_ = str(weight) if len(symbol.arguments) == 1 else ",".join([str(weight)]+[str(n) for n in symbol.arguments[1:]])
+                current_cost += prev_sum * tuple_weight
+                level_weight += tuple_weight
+                tuple_ = str(tuple_weight) if len(symbol.arguments) == 1 else ",".join([str(tuple_weight)]+[str(n) for n in symbol.arguments[1:]])
                 naf = "" if not negated else "not "
-                ground_set.append(f"{tuple_}:{naf}{str(symbol)}")
+                level_set.append(f"{tuple_}:{naf}{str(symbol)}")
+            #a bound for the level is at most the sum of its weights plus one
+            self.bound_externals[lev] = [clingo.Function(SolverSettings.GLOBAL_WEAK_BOUND_ATOM_NAME, [clingo.Number(lev), clingo.Number(bit)]) for bit in range((level_weight + 1).bit_length())]
+            level_set += [f"-{2 ** bit},{SolverSettings.GLOBAL_WEAK_BOUND_ATOM_NAME},{bit}:{str(external)}" for (bit, external) in enumerate(self.bound_externals[lev])]
+            self.bound_program += "".join(f"#external {str(external)}.\n" for external in self.bound_externals[lev])
+            #violations at the level compared with the bound of the level
+            template_constraint = "; ".join(level_set)
+            self.bound_program += f"{SolverSettings.GLOBAL_WEAK_LOWER_ATOM_NAME}({lev}) :- #sum{{{template_constraint}}} < 0.\n"
+            self.bound_program += f"{SolverSettings.GLOBAL_WEAK_HIGHER_ATOM_NAME}({lev}) :- #sum{{{template_constraint}}} > 0.\n"
             prev_sum += current_cost
             self.total_cost_for_level[lev] = prev_sum
 
-        template_constraint = "; ".join(ground_set)
-        
-        self.placeholder_constraint = "[[V_global_head]]" + ":- #sum{" + template_constraint +"} >= [[bound]].\n:~ [[V_global_head]]. [" + str(SolverSettings.WEIGHT_FOR_VIOLATED_WEAK_CONSTRAINTS) + "@" + str(SolverSettings.GLOBAL_WEAK_CONSTRAINT_LEVEL) + "]"
+        #lexicographic comparison of the violations with the bound from the highest level
+        higher = None
+        for lev in reversed(levels):
+            lower, equal = f"{SolverSettings.GLOBAL_WEAK_LOWER_ATOM_NAME}({lev})", f"not {SolverSettings.GLOBAL_WEAK_LOWER_ATOM_NAME}({lev}), not {SolverSettings.GLOBAL_WEAK_HIGHER_ATOM_NAME}({lev})"
+            if higher is None:
+                self.bound_program += f"{SolverSettings.GLOBAL_WEAK_BETTER_ATOM_NAME}({lev}) :- {lower}.\n{SolverSettings.GLOBAL_WEAK_EQUAL_ATOM_NAME}({lev}) :- {equal}.\n"
+            else:
+                self.bound_program += f"{SolverSettings.GLOBAL_WEAK_BETTER_ATOM_NAME}({lev}) :- {SolverSettings.GLOBAL_WEAK_BETTER_ATOM_NAME}({higher}).\n"
+                self.bound_program += f"{SolverSettings.GLOBAL_WEAK_BETTER_ATOM_NAME}({lev}) :- {SolverSettings.GLOBAL_WEAK_EQUAL_ATOM_NAME}({higher}), {lower}.\n"
+                self.bound_program += f"{SolverSettings.GLOBAL_WEAK_EQUAL_ATOM_NAME}({lev}) :- {SolverSettings.GLOBAL_WEAK_EQUAL_ATOM_NAME}({higher}), {equal}.\n"
+            higher = lev
+        better = "" if len(levels) == 0 else f" :- not {SolverSettings.GLOBAL_WEAK_BETTER_ATOM_NAME}({levels[0]})"
+        self.bound_program += self.current_violated_bound_atom_name + better + ".\n:~ " + self.current_violated_bound_atom_name + ". [" + str(SolverSettings.WEIGHT_FOR_VIOLATED_WEAK_CONSTRAINTS) + "@" + str(SolverSettings.GLOBAL_WEAK_CONSTRAINT_LEVEL) + "]"
         self.sorted_levels = sorted([level for level in self.global_weak_violation_atoms_for_level])
         
     def compute_cost_and_new_upper_bound(self, model=None):
-        assert self.placeholder_constraint != ""
+        assert self.bound_program != ""
         prev_sum = 1
         bound = 0
         cost_string = ""
-        self.current_violated_bound_atom_name = f"{SolverSettings.GLOBAL_WEAK_VIOLATED_BOUND_ATOM_NAME}{self.iteration}"
-        self.violated_bound_atoms.append(self.current_violated_bound_atom_name)
+        self.current_violations = dict()
         for lev in self.sorted_levels:
             current_cost = 0
+            self.current_violations[lev] = 0
             for (atom,negated) in self.global_weak_violation_atoms_for_level[lev]:
                 weight = int(str(atom.arguments[0]))
                 pos_weight = weight if weight >= 0 else -weight
@@ -94,9 +127,20 @@ class RefinementGlobalWeakRewriter:
                 if (negated and atom in model) or (not negated and atom not in model):
                     continue
                 bound += prev_sum * pos_weight
+                self.current_violations[lev] += pos_weight
             cost_string = cost_string + str(lev) + ":" + str(current_cost) + (", " if lev != self.sorted_levels[-1] else "" )   
             # print(lev,":",current_cost,end=", " if lev != self.sorted_levels[-1] else "")
             prev_sum = self.total_cost_for_level[lev]
         # print()
         self.iteration += 1
-        return (self.placeholder_constraint.replace("[[bound]]",str(bound)).replace("[[V_global_head]]", self.current_violated_bound_atom_name), cost_string)    
+        return (bound, cost_string)
+
+    #truth values of the bound externals encoding the given bound - the bound of a level is the quotient with the scale of
+    #the level of what is left from the levels above, so that costs lower than the bound are the lexicographically lower ones
+    def bound_assignment(self, bound):
+        assignment = []
+        for lev in reversed(self.sorted_levels):
+            level_bound = bound // self.level_scale[lev]
+            bound -= level_bound * self.level_scale[lev]
+            assignment += [(external, (level_bound >> bit) & 1 == 1) for (bit, external) in enumerate(self.bound_externals[lev])]
+        return assignment    
@@ -24,12 +24,16 @@ class RefinementNoWeakRewriter(RefinementRewriter):
     SUFFIX_P : str = "_p_"
     SUFFIX_N : str = "_n_"
     FAIL_ATOM_NAME = "fail_"
+    TEMPLATE_PROGRAM_NAME : str = "refine"
+    ITERATION_PARAMETER : str = "refinement_iteration"
 
     reduct_rewriter : ReductRewriter
     original_programs_list : list
     rewritten_programs_list : list
     constraint_program_rewriter : OrProgramRewriter
     to_rewrite_constraint : QuantifiedProgram
+    template_program : str
+    template_program_name : str
 
     def __init__(self, original_programs, program_c, program_neg_c, ground_transformation):
         self.original_programs_list = original_programs
@@ -38,18 +42,22 @@ class RefinementNoWeakRewriter(RefinementRewriter):
         self.to_rewrite_constraint = program_c if self.original_programs_list[0].program_type == ProgramQuantifier.FORALL else program_neg_c
         self.rewritten_programs_list = []
         self.constraint_program_rewriter = OrProgramRewriter(self.reduct_rewriter.to_rewrite_predicates, self.FAIL_ATOM_NAME, True, self.to_rewrite_constraint)
+        self.template_program = ""
+        self.template_program_name = self.TEMPLATE_PROGRAM_NAME
 
     def rewrite(self, counterexample, iteration):
         self.reduct_rewriter.rewrite(counterexample, iteration)
     
         self.constraint_program_rewriter.rewrite(self.SUFFIX_P, iteration)
-        self.rewritten_programs_list = [*self.reduct_rewriter.rewritten_programs_list, QuantifiedProgram(self.constraint_program_rewriter.rewritten_program, [], ProgramQuantifier.CONSTRAINTS, "c", self.to_rewrite_constraint.head_predicates)]
+        #head predicates of the constraint program are rewritten on the + signature of the iteration
+        constraint_head_predicates = set(f"{pred}{self.SUFFIX_P}{iteration}" for pred in self.to_rewrite_constraint.head_predicates)
+        self.rewritten_programs_list = [*self.reduct_rewriter.rewritten_programs_list, QuantifiedProgram(self.constraint_program_rewriter.rewritten_program, [], ProgramQuantifier.CONSTRAINTS, "c", constraint_head_predicates)]
         
         
     #called from outside only when the refinement becomes an ASP program
     def refined_program(self):
         #collapse the first three programs into an exists program and rename the remaining ones
-        if len(self.original_programs_list) > 3:
+        if self.refinement_is_aspq():
             refinement_aspq = []
             refinement_str = ""
             head_predicates = set()
@@ -75,4 +83,22 @@ class RefinementNoWeakRewriter(RefinementRewriter):
 
     def compute_placeholder_program(self):
         self.constraint_program_rewriter.compute_placeholder_program()
-        self.reduct_rewriter.compute_placeholder_program()
\ No newline at end of file
+        self.reduct_rewriter.compute_placeholder_program()
+
+    #refinement is an ASPQ (and not an ASP program) when programs remain after collapsing the first three quantifiers
+    def refinement_is_aspq(self):
+        return len(self.original_programs_list) > 2
+
+    #refinement as a #program with the iteration as parameter - each refinement is a new instance of the same program
+    #predicates are rewritten as p_p_(X, i), p_n_(X, i) and fail_(i) instead of p_p_i(X), p_n_i(X) and fail_i
+    def compute_template_program(self):
+        assert not self.refinement_is_aspq()
+        if self.template_program != "":
+            return
+        self.reduct_rewriter.compute_template_program(self.ITERATION_PARAMETER)
+        constraint_template = self.constraint_program_rewriter.compute_template_program(self.SUFFIX_P, self.ITERATION_PARAMETER)
+        self.template_program = "\n".join([*self.reduct_rewriter.template_programs_list_rules, constraint_template])
+
+    #facts fixing the counterexample in the instance of the template for the given iteration
+    def counterexample_template_symbols(self, counterexample, iteration):
+        return self.reduct_rewriter.counterexample_template_symbols(counterexample, iteration)
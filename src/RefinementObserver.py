@@ -0,0 +1,49 @@
+# Copyright [2025] [Andrea Cuteri, Giuseppe Mazzotta and Francesco Ricca]
+
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+
+#        http://www.apache.org/licenses/LICENSE-2.0
+
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+from typing import List, Sequence, Tuple
+import clingo
+
+
+#used to collect the ground rules of a refinement template so that they can be replayed through the backend
+class RefinementObserver(clingo.Observer):
+    rules : list
+    weight_rules : list
+    supported : bool
+
+    def __init__(self):
+        self.rules = []
+        self.weight_rules = []
+        self.supported = True
+
+    def rule(self, choice: bool, head: Sequence[int], body: Sequence[int]) -> None:
+        self.rules.append((choice, list(head), list(body)))
+
+    def weight_rule(self, choice: bool, head: Sequence[int], lower_bound: int, body: Sequence[Tuple[int,int]]) -> None:
+        self.weight_rules.append((choice, list(head), lower_bound, list(body)))
+
+    #statements that cannot be replayed as refinement rules
+    def minimize(self, priority: int, literals: List[Tuple[int,int]]) -> None:
+        self.supported = False
+
+    def project(self, atoms: Sequence[int]) -> None:
+        self.supported = False
+
+    def heuristic(self, atom, type_, bias, priority, condition) -> None:
+        self.supported = False
+
+    def theory_atom(self, atom_id_or_zero, term_id, elements) -> None:
+        self.supported = False
+
+    def theory_atom_with_guard(self, atom_id_or_zero, term_id, elements, operator_id, right_hand_side_id) -> None:
+        self.supported = False
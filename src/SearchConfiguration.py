@@ -0,0 +1,44 @@
+# Copyright [2025] [Andrea Cuteri, Giuseppe Mazzotta and Francesco Ricca]
+
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+
+#        http://www.apache.org/licenses/LICENSE-2.0
+
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+import clingo
+
+#clingo search options of the controls of one role of the solver (candidate or counterexample search)
+#options left empty keep the clingo default
+class SearchConfiguration:
+    #number of threads and optional mode (compete or split), e.g. 4 or 4,split
+    parallel_mode : str
+    #clingo configuration preset (e.g. auto, frumpy, jumpy, tweety, handy, crafty, trendy, many)
+    configuration : str
+    #clingo decision heuristic (e.g. Berkmin, Vmtf, Vsids, Domain, Unit, None)
+    heuristic : str
+
+    def __init__(self, parallel_mode="", configuration="", heuristic=""):
+        self.parallel_mode = str(parallel_mode)
+        self.configuration = configuration
+        self.heuristic = heuristic
+
+    #arguments of clingo.Control
+    def arguments(self):
+        arguments = []
+        if self.parallel_mode != "":
+            arguments.append(f"--parallel-mode={self.parallel_mode}")
+        if self.configuration != "":
+            arguments.append(f"--configuration={self.configuration}")
+        if self.heuristic != "":
+            arguments.append(f"--heuristic={self.heuristic}")
+        return arguments
+
+    #raises an exception if clingo does not accept the options
+    def check(self):
+        clingo.Control(self.arguments())
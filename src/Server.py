@@ -0,0 +1,153 @@
+# Copyright [2025] [Andrea Cuteri, Giuseppe Mazzotta and Francesco Ricca]
+
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+
+#        http://www.apache.org/licenses/LICENSE-2.0
+
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+import argparse
+import contextlib
+import io
+import json
+import os
+import socket
+import stat
+import sys
+
+
+#long running solver answering json requests (one per line)
+#encodings are registered once and kept parsed and rewritten (together with the rewriters cached by their programs handler)
+#so that every solve request only pays for grounding and solving the instance
+#
+#requests:
+#  {"command" : "register", "problem" : path | "encoding" : program, "id" : id (optional), "options" : {"n" : 0, ...} (optional)}
+#  {"command" : "solve", "id" : id, "instance" : path (optional), "facts" : program (optional)}
+#  {"command" : "unregister", "id" : id}
+#  {"command" : "shutdown"}
+#every request gets one json response, errors are reported as {"error" : message}
+class Server:
+    DEFAULT_ENCODING_ID : str = "default"
+    #options that can be set per encoding
+    OPTIONS : set = {"n", "debug", "global_weak_lower_bound", "no_weak", "statistics", "json", "ndjson", "flush_models", "constraint", "ground_refinement"}
+
+    prepare : object
+    solve_record : object
+    args : argparse.Namespace
+    #encoding id -> (prepared encoding, options of the encoding)
+    encodings : dict
+    registered : int
+    running : bool
+
+    def __init__(self, prepare, solve_record, args):
+        self.prepare = prepare
+        self.solve_record = solve_record
+        self.args = args
+        self.encodings = dict()
+        self.registered = 0
+        self.running = True
+
+    def handle(self, request):
+        command = request.get("command")
+        if command == "register":
+            return self.register(request)
+        if command == "solve":
+            return self.solve(request)
+        if command == "unregister":
+            self.encoding(request)
+            del self.encodings[request["id"]]
+            return {"id" : request["id"]}
+        if command == "shutdown":
+            self.running = False
+            return {}
+        raise Exception(f"Unknown command {command}")
+
+    def register(self, request):
+        if "problem" in request:
+            encoding_program = "\n".join(open(request["problem"]).readlines())
+        elif "encoding" in request:
+            encoding_program = request["encoding"]
+        else:
+            raise Exception("Either problem or encoding is required")
+        args = argparse.Namespace(**vars(self.args))
+        for (option, value) in request.get("options", dict()).items():
+            if not option in self.OPTIONS:
+                raise Exception(f"Unknown option {option}")
+            setattr(args, option, value)
+        encoding_id = str(request.get("id", self.registered))
+        self.encodings[encoding_id] = (self.prepare_encoding(encoding_program, args), args)
+        self.registered += 1
+        return {"id" : encoding_id}
+
+    #prepare reports invalid encodings by printing a message and exiting - the message is moved to stderr (stdout can be
+    #the protocol stream) and the exit is turned into an error response so that the server keeps running
+    def prepare_encoding(self, encoding_program, args):
+        diagnostics = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(diagnostics):
+                return self.prepare(encoding_program, args)
+        except SystemExit as e:
+            message = diagnostics.getvalue().strip()
+            raise Exception(message if message != "" else f"Could not prepare encoding (exit code {e.code})")
+        finally:
+            sys.stderr.write(diagnostics.getvalue())
+
+    def encoding(self, request):
+        if not request.get("id") in self.encodings:
+            raise Exception(f"Unknown encoding {request.get('id')}")
+        return self.encodings[request["id"]]
+
+    def solve(self, request):
+        (prepared, args) = self.encoding(request)
+        instance_program = ""
+        if "instance" in request:
+            instance_program = "\n".join(open(request["instance"]).readlines())
+        instance_program += request.get("facts", "")
+        record = {"id" : request["id"]}
+        record.update(self.solve_record(prepared, instance_program, args))
+        return record
+
+    def serve_stream(self, input, output):
+        for line in input:
+            if line.strip() == "":
+                continue
+            try:
+                response = self.handle(json.loads(line))
+            except Exception as e:
+                response = {"error" : str(e)}
+            output.write(json.dumps(response) + "\n")
+            output.flush()
+            if not self.running:
+                return
+
+    #serves requests from stdin or from the clients connecting (one at a time) to the unix socket
+    def serve(self, socket_path):
+        if self.args.problem != "":
+            try:
+                self.register({"problem" : self.args.problem, "id" : self.DEFAULT_ENCODING_ID})
+            except Exception as e:
+                print(f"Could not register problem file: {e}")
+                return 1
+        if socket_path == "":
+            self.serve_stream(sys.stdin, sys.stdout)
+            return 0
+
+        if os.path.exists(socket_path) and stat.S_ISSOCK(os.stat(socket_path).st_mode):
+            os.unlink(socket_path)
+        server_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server_socket.bind(socket_path)
+        try:
+            server_socket.listen()
+            while self.running:
+                (connection, _) = server_socket.accept()
+                with connection, connection.makefile("r") as input, connection.makefile("w") as output:
+                    self.serve_stream(input, output)
+        finally:
+            server_socket.close()
+            os.unlink(socket_path)
+        return 0
@@ -13,6 +13,8 @@
 #    limitations under the License.
 import logging
 from .QuantifiedProgram import QuantifiedProgram
+from .ModelOutput import ModelOutput
+from .SearchConfiguration import SearchConfiguration
 
 class SolverSettings:
 
@@ -23,6 +25,11 @@ class SolverSettings:
     WEAK_VIOLATION_ATOM_NAME : str = "violated"
     GLOBAL_WEAK_VIOLATION_ATOM_NAME : str = "violated_global"
     GLOBAL_WEAK_VIOLATED_BOUND_ATOM_NAME: str = "violated_global_bound"
+    GLOBAL_WEAK_BOUND_ATOM_NAME: str = "global_weak_bound"
+    GLOBAL_WEAK_LOWER_ATOM_NAME: str = "global_weak_lower"
+    GLOBAL_WEAK_HIGHER_ATOM_NAME: str = "global_weak_higher"
+    GLOBAL_WEAK_EQUAL_ATOM_NAME: str = "global_weak_equal"
+    GLOBAL_WEAK_BETTER_ATOM_NAME: str = "global_weak_better"
     DIFF_COST_AT_LEVEL : str = "diff"
     HAS_HIGHER_DIFF : str = "hasHigher"
     HIGHEST_LEVEL_DIFF : str = "highest"
@@ -35,6 +42,7 @@ class SolverSettings:
     RELAXED_CPREDICATE : str = "violated_constraint"
     UNSAT_C_PREDICATE : str = "unsat_c"
     FOUND_LEVEL : str = "found_level"
+    REFINEMENT_ACTIVE_ATOM_NAME : str = "refinement_active"
 
     WEIGHT_FOR_VIOLATED_WEAK_CONSTRAINTS: int = 1
 
@@ -52,8 +60,22 @@ class SolverSettings:
     no_weak : bool
     collapse_global_weak : bool
     json_format : bool
+    ndjson_format : bool
+    model_output : ModelOutput
+    ground_refinement : bool
+    #candidates enumerated at once and checked in parallel for counterexamples (2-ASP(Q) without weak constraints)
+    speculative_candidates : int
+    #refinements not relevant for this many consecutive candidates are retired (if zero refinements are never retired)
+    refinement_lifetime : int
+    #clingo search options of the controls searching for candidates (ctl move) and counterexamples (ctl countermove)
+    move_search : SearchConfiguration
+    countermove_search : SearchConfiguration
+    #counterexample searches with weak constraints in P_2 start from the cost of the last optimal counterexample as bound
+    countermove_warm_start : bool
+    #strategy choosing the bounds probed by the optimization of global weak constraints (see GlobalWeakSearch)
+    global_weak_strategy : str
 
-    def __init__(self, n_models, debug, constraint_print, ground_transformation, no_weak, collapse_global_weak=False, json_format=False):
+    def __init__(self, n_models, debug, constraint_print, ground_transformation, no_weak, collapse_global_weak=False, json_format=False, ground_refinement=False, move_search=None, countermove_search=None, ndjson_format=False, model_output=None, speculative_candidates=1, refinement_lifetime=0, global_weak_strategy="linear", countermove_warm_start=False):
         self.ground_transformation = ground_transformation
         self.n_models = n_models
         self.debug = debug
@@ -63,6 +85,15 @@ class SolverSettings:
         self.setup_logging(self.debug)
         self.collapse_global_weak = collapse_global_weak
         self.json_format = json_format
+        self.ground_refinement = ground_refinement
+        self.move_search = SearchConfiguration() if move_search is None else move_search
+        self.countermove_search = SearchConfiguration() if countermove_search is None else countermove_search
+        self.ndjson_format = ndjson_format
+        self.model_output = ModelOutput() if model_output is None else model_output
+        self.speculative_candidates = speculative_candidates
+        self.refinement_lifetime = refinement_lifetime
+        self.global_weak_strategy = global_weak_strategy
+        self.countermove_warm_start = countermove_warm_start
 
     def setup_logging(self, debug: bool):
         logging.basicConfig()
@@ -11,24 +11,93 @@
 #    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
+import contextlib
+import json
+import time
+
+#counters and timings of the whole solving process (shared by the main solver and all its sub solvers)
+#time is charged to the innermost running phase, so that phases of sub solvers are not counted twice
 class SolverStatistics:
+    PARSING : str = "parsing"
+    GROUND_MOVE : str = "ground_move"
+    GROUND_COUNTERMOVE : str = "ground_countermove"
+    CANDIDATE_SOLVE : str = "candidate_solve"
+    COUNTEREXAMPLE_SOLVE : str = "counterexample_solve"
+    REFINEMENT : str = "refinement"
+
     _instance = None
     conterexample_found : int = 0
     aspq_solvers_calls : int = 0
     models_found : int = 0
     solvers_iterations : int = 0
+    refinements_skipped : int = 0
+    refinements_retired : int = 0
+    #phase -> [wall time, cpu time, calls]
+    phases : dict
+    running_phases : list
+    #(wall time, cpu time) of the last time a phase was entered or left
+    last_switch : tuple
+    start : tuple
+    #size of the ground program of the main ctl move at every candidate search
+    iterations : list
+    clingo_statistics : dict
     
     def __new__(cls, *args, **kwargs):
         if cls._instance is None:
             cls._instance = super(SolverStatistics, cls).__new__(cls)
+            cls._instance.reset()
         return cls._instance
 
     def __init__(self):
         pass
 
+    def reset(self):
+        self.conterexample_found = 0
+        self.aspq_solvers_calls = 0
+        self.models_found = 0
+        self.solvers_iterations = 0
+        self.refinements_skipped = 0
+        self.refinements_retired = 0
+        self.phases = dict()
+        self.running_phases = []
+        self.start = (time.perf_counter(), time.process_time())
+        self.last_switch = self.start
+        self.iterations = []
+        self.clingo_statistics = dict()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        self.switch_phase()
+        self.running_phases.append(name)
+        self.phases.setdefault(name, [0.0, 0.0, 0])[2] += 1
+        try:
+            yield
+        finally:
+            self.switch_phase()
+            self.running_phases.pop()
+
+    #charges the time elapsed since the last switch to the innermost running phase
+    def switch_phase(self):
+        now = (time.perf_counter(), time.process_time())
+        if len(self.running_phases) > 0:
+            times = self.phases[self.running_phases[-1]]
+            times[0] += now[0] - self.last_switch[0]
+            times[1] += now[1] - self.last_switch[1]
+        self.last_switch = now
+
+    def ground_program_size(self, atoms, rules):
+        previous = self.iterations[-1] if len(self.iterations) > 0 else {"atoms" : 0, "rules" : 0}
+        self.iterations.append({"iteration" : self.solvers_iterations, "atoms" : atoms, "rules" : rules, "atoms_added" : atoms - previous["atoms"], "rules_added" : rules - previous["rules"]})
+
     def counterexample_found(self):
         self.conterexample_found+=1
 
+    def refinement_skipped(self):
+        self.refinements_skipped += 1
+
+    def refinement_retired(self):
+        self.refinements_retired += 1
+
     def model_found(self):
         self.models_found += 1
 
@@ -39,4 +108,29 @@ class SolverStatistics:
         print(f"Models found {self.models_found}")
         print(f"ASPQ solvers calls {self.solvers_iterations}")
         print(f"Counterexample found {self.conterexample_found}")
+        print(f"Refinements skipped {self.refinements_skipped}")
+        print(f"Refinements retired {self.refinements_retired}")
+        for (name, (wall, cpu, calls)) in self.phases.items():
+            print(f"Time {name} {wall:.3f}s (cpu {cpu:.3f}s, calls {calls})")
+        total = self.total_time()
+        print(f"Time total {total[0]:.3f}s (cpu {total[1]:.3f}s)")
+        if len(self.iterations) > 0:
+            print(f"Ground program of ctl move {self.iterations[-1]['atoms']} atoms {self.iterations[-1]['rules']} rules")
+
+    def total_time(self):
+        return (time.perf_counter() - self.start[0], time.process_time() - self.start[1])
 
+    def print_statistics_json(self):
+        total = self.total_time()
+        statistics = {
+            "models_found" : self.models_found,
+            "solvers_iterations" : self.solvers_iterations,
+            "counterexamples_found" : self.conterexample_found,
+            "refinements_skipped" : self.refinements_skipped,
+            "refinements_retired" : self.refinements_retired,
+            "time" : {"wall" : total[0], "cpu" : total[1]},
+            "phases" : {name : {"wall" : wall, "cpu" : cpu, "calls" : calls} for (name, (wall, cpu, calls)) in self.phases.items()},
+            "iterations" : self.iterations,
+            "clingo" : self.clingo_statistics
+        }
+        print(json.dumps({"statistics" : statistics}))
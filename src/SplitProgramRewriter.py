@@ -103,8 +103,8 @@ class SplitProgramRewriter(Rewriter):
     def closed_program(self):
         program_str = "".join(self.cur_program_rules)
         if self.program_is_open:
-            if not re.search(r'fail_\d+|unsat_c', program_str) is None:
-                print("Predicate names and constants of the form fail_\\d+ or unsat_c are not allowed... Exiting")
+            if not re.search(r'\bfail_(\d+\b|\b)|unsat_c', program_str) is None:
+                print("Predicate names and constants fail_, fail_N (N a number) and unsat_c are reserved... Exiting")
                 sys.exit(1)
             program = QuantifiedProgram("\n".join(self.cur_program_rules), self.curr_weak_constraints, self.cur_program_quantifier, self.curr_program_name, self.head_predicates)
             if self.cur_program_quantifier != ProgramQuantifier.GLOBAL_WEAK:
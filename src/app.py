@@ -13,16 +13,29 @@
 #    limitations under the License.
 from clingo.ast import parse_string
 from .SolverStatistics import SolverStatistics
+from .CegarTrace import CegarTrace
 from .SplitProgramRewriter import SplitProgramRewriter
 from .ProgramsHandler import ProgramsHandler
 from .SolverSettings import SolverSettings
+from .ModelOutput import ModelOutput
+from .SearchConfiguration import SearchConfiguration
+from .GlobalWeakSearch import GlobalWeakSearch
 from .ASPQSolver import ASPQSolver
 from .WeakRewriter import WeakRewriter
+from .Portfolio import Portfolio
+from .BatchSolver import BatchSolver
+from .Server import Server
 import argparse
+import contextlib
+import io
+import json
+import time
 
 import signal
 import sys
 
+RESULTS = {10 : "SAT", 20 : "UNSAT", 30 : "SAT"}
+
 def _handle_signal(signum, frame):
     print("Sig term")
     sys.stdout.flush()
@@ -33,16 +46,46 @@ def entrypoint():
     signal.signal(signal.SIGINT, _handle_signal)
     parser = argparse.ArgumentParser(prog = "Casper", description = "A native solver based on CEGAR for 2-ASP(Q)\n")
 
-    parser.add_argument('--problem', help="path to problem file\n", required=True)
+    parser.add_argument('--problem', help="path to problem file (required unless running as server)\n", required=False, default="")
     parser.add_argument('--instance', help="path to instance file\n", required=False, default="")
     parser.add_argument('--debug', help="enable debug\n", required=False, action="store_true")
     parser.add_argument('--global-weak-lower-bound', help="Apply lower bound improving for global weak constraints (default is upper bound improving)\n", required=False, action="store_true")
+    parser.add_argument('--global-weak-strategy', help="bounds probed by the optimization of global weak constraints: linear (upper bound improving), bisection, lexicographic (one level at a time) or stratified (one level at a time alternating bisection and upper bound probes)\n", required=False, default=GlobalWeakSearch.LINEAR, choices=GlobalWeakSearch.STRATEGIES)
     parser.add_argument('--no-weak', help="completely remove weak constraints before solve optimization ASP(Q) programs\n", required=False, action="store_true")
-    parser.add_argument('--statistics', help="print solving statistics\n", required=False, action="store_true")
+    parser.add_argument('--statistics', help="print solving statistics (as a json object with --json)\n", required=False, action="store_true")
     parser.add_argument('--json', help="print quantified answer sets in json format - done for integration with ASPChef\n", required=False, action="store_true")
+    parser.add_argument('--ndjson', help="print quantified answer sets as compact json lines with their true output atoms\n", required=False, action="store_true")
+    parser.add_argument('--output', help="write quantified answer sets to the given file instead of the standard output\n", required=False, default="")
+    parser.add_argument('--flush-models', help="flush the output every N quantified answer sets (if zero leave it to the buffering of the output)\n", required=False, default=0)
     parser.add_argument('--constraint', help="enable constraint print of models\n", required=False, action="store_true")
+    parser.add_argument('--ground-refinement', help="add refinements of 2-ASP(Q) programs without weak constraints as ground rules through the clingo backend\n", required=False, action="store_true")
+    parser.add_argument('--speculative-candidates', help="enumerate K candidates at once and check them for counterexamples in parallel (2-ASP(Q) programs without weak constraints)\n", required=False, default=1)
+    parser.add_argument('--refinement-lifetime', help="retire refinements that were not relevant for the last N candidates (if zero refinements are never retired)\n", required=False, default=0)
+    parser.add_argument('--countermove-warm-start', help="bound every counterexample search of 2-ASP(Q) programs with weak constraints in P_2 by the cost of the last optimal counterexample\n", required=False, action="store_true")
+    parser.add_argument('--move-parallel-mode', help="clingo parallel mode (threads and optionally compete or split, e.g. 4,split) of the candidate search\n", required=False, default="")
+    parser.add_argument('--countermove-parallel-mode', help="clingo parallel mode (threads and optionally compete or split, e.g. 4,split) of the counterexample search\n", required=False, default="")
+    parser.add_argument('--move-configuration', help="clingo configuration preset (e.g. crafty, trendy, many) of the candidate search\n", required=False, default="")
+    parser.add_argument('--countermove-configuration', help="clingo configuration preset (e.g. crafty, trendy, many) of the counterexample search\n", required=False, default="")
+    parser.add_argument('--move-heuristic', help="clingo decision heuristic (e.g. Berkmin, Vmtf, Vsids, Domain) of the candidate search\n", required=False, default="")
+    parser.add_argument('--countermove-heuristic', help="clingo decision heuristic (e.g. Berkmin, Vmtf, Vsids, Domain) of the counterexample search\n", required=False, default="")
+    parser.add_argument('--trace', help="write one json record per iteration of the cegar loop of every solver to the given file\n", required=False, default="")
+    parser.add_argument('--portfolio', help="run N differently configured solvers in parallel and report the first one that terminates\n", required=False, default=1)
+    parser.add_argument('--batch', help="solve the problem against every instance of a directory or of a manifest file (one instance path per line) and print one json record per instance\n", required=False, default="")
+    parser.add_argument('--workers', help="number of worker processes used by batch solving (if zero use all cores)\n", required=False, default=0)
+    parser.add_argument('--server', help="run as a server reading json requests (one per line) from stdin or from the unix socket given with --socket\n", required=False, action="store_true")
+    parser.add_argument('--socket', help="path of the unix socket the server listens on\n", required=False, default="")
     parser.add_argument('-n', help="number of q-answer sets to compute (if zero enumerate)\n", default=1)
+    #settings that are only changed by configurations of the portfolio
+    parser.set_defaults(ground_transformation=True, heuristic="")
     args = parser.parse_args()
+    if args.output != "" and (args.server or args.batch != "" or int(args.portfolio) > 1):
+        print("Output file cannot be combined with --server, --batch or --portfolio")
+        exit(1)
+    if args.server:
+        server = Server(prepare, solve_record, args)
+        exit(server.serve(args.socket))
+    if args.problem == "":
+        parser.error("the following arguments are required: --problem")
     encoding_path = args.problem
     instance_path = args.instance
     
@@ -62,35 +105,135 @@ def entrypoint():
             print("Could not open instance file")
             exit(1)
 
+    if args.trace != "":
+        if args.batch != "" or int(args.portfolio) > 1:
+            print("Tracing cannot be combined with --batch or --portfolio")
+            exit(1)
+        try:
+            CegarTrace().open(args.trace)
+        except:
+            print("Could not open trace file")
+            exit(1)
+
+    if args.batch != "":
+        if instance_path != "" or int(args.portfolio) > 1:
+            print("Batch solving cannot be combined with --instance or --portfolio")
+            exit(1)
+        try:
+            instance_paths = BatchSolver.instance_paths(args.batch)
+        except:
+            print("Could not open batch directory or manifest")
+            exit(1)
+        batch_solver = BatchSolver(solve_record, prepare(encoding_program, args), args, int(args.workers))
+        for record in batch_solver.run(instance_paths):
+            print(json.dumps(record))
+            sys.stdout.flush()
+        exit(0)
+
+    if int(args.portfolio) > 1:
+        portfolio = Portfolio(solve, args, int(args.portfolio))
+        (exit_code, output) = portfolio.run(encoding_program, instance_program)
+        print(output, end="")
+        exit(exit_code)
+    exit(solve(encoding_program, instance_program, args))
+
+#solves the ASP(Q) program with the configuration given by the parsed arguments and returns the exit code
+def solve(encoding_program, instance_program, args):
+    SolverStatistics().reset()
+    return solve_instance(prepare(encoding_program, args), instance_program, args)
+
+#parses and rewrites the encoding once, the result can be solved against any instance
+#returns the programs handler (without instance), the solver settings and whether the problem has global weak constraints
+def prepare(encoding_program, args):
+    with SolverStatistics().phase(SolverStatistics.PARSING):
+        return prepare_encoding(encoding_program, args)
+
+def prepare_encoding(encoding_program, args):
     split_program_rewriter = SplitProgramRewriter(encoding_program)
     problem_has_global_weak = False
     collapse_global_weak_in_p1 = args.global_weak_lower_bound
     if not split_program_rewriter.global_weak is None and collapse_global_weak_in_p1:
         problem_has_global_weak = True
-    collapse_global_weak_in_p1 = bool(args.global_weak_lower_bound)
-    solver_settings = SolverSettings(int(args.n), bool(args.debug), bool(args.constraint), split_program_rewriter.propositional_program, bool(args.no_weak), collapse_global_weak_in_p1, bool(args.json))
+    #lower bound improving is applied only if the problem has global weak constraints
+    collapse_global_weak_in_p1 = problem_has_global_weak
+    ground_transformation = split_program_rewriter.propositional_program and args.ground_transformation
+    solver_settings = SolverSettings(int(args.n), bool(args.debug), bool(args.constraint), ground_transformation, bool(args.no_weak), collapse_global_weak_in_p1, bool(args.json), bool(args.ground_refinement), *prepare_search_configurations(args), bool(args.ndjson), prepare_model_output(args), int(args.speculative_candidates), int(args.refinement_lifetime), args.global_weak_strategy, bool(args.countermove_warm_start))
 
     weak_rewriter = WeakRewriter(split_program_rewriter, solver_settings.no_weak, collapse_global_weak_in_p1)
     #check if rewritten program contains weak (for example, in \exists_weak \exist programs weak are never rewritten) 
     solver_settings.no_weak = solver_settings.no_weak or weak_rewriter.rewritten_program_contains_weak
     
-    programs_handler = ProgramsHandler(weak_rewriter.rewritten_program(), instance_program, weak_rewriter.global_weak)
+    programs_handler = ProgramsHandler(weak_rewriter.rewritten_program(), "", weak_rewriter.global_weak)
     programs_handler.check_aspq_type()
     if programs_handler.program_contains_weak():
         solver_settings.n_models = 1
-    solver  = ASPQSolver(programs_handler, solver_settings, True, 0)
-    result = solver.solve_n_levels([], "")
+    return (programs_handler, solver_settings, problem_has_global_weak)
+
+#search configurations of ctl move and ctl countermove - the heuristic of a portfolio configuration applies to both unless given explicitly
+def prepare_search_configurations(args):
+    move_search = SearchConfiguration(args.move_parallel_mode, args.move_configuration, args.move_heuristic if args.move_heuristic != "" else args.heuristic)
+    countermove_search = SearchConfiguration(args.countermove_parallel_mode, args.countermove_configuration, args.countermove_heuristic if args.countermove_heuristic != "" else args.heuristic)
+    try:
+        move_search.check()
+        countermove_search.check()
+    except:
+        print("Could not configure clingo search")
+        exit(1)
+    return (move_search, countermove_search)
+
+def prepare_model_output(args):
+    try:
+        return ModelOutput(args.output, int(args.flush_models))
+    except:
+        print("Could not open output file")
+        exit(1)
+
+#solves an instance capturing everything printed by the solver and returns the result record of the instance
+def solve_record(prepared, instance_program, args):
+    record = dict()
+    output = io.StringIO()
+    start = time.perf_counter()
+    #statistics are per instance when several instances are solved by the same process
+    SolverStatistics().reset()
+    with contextlib.redirect_stdout(output):
+        try:
+            exit_code = solve_instance(prepared, instance_program, args)
+        except SystemExit as e:
+            exit_code = e.code
+        except Exception as e:
+            exit_code = 1
+            record["error"] = str(e)
+    record["exit_code"] = exit_code
+    record["result"] = RESULTS.get(exit_code)
+    record["time"] = time.perf_counter() - start
+    record["output"] = output.getvalue()
+    return record
+
+def solve_instance(prepared, instance_program, args):
+    (programs_handler, solver_settings, problem_has_global_weak) = prepared
+    solver  = ASPQSolver(programs_handler.with_instance(instance_program), solver_settings, True, 0)
+    try:
+        result = solver.solve_n_levels([], "")
+    finally:
+        solver_settings.model_output.flush()
+    SolverStatistics().clingo_statistics = solver.clingo_statistics()
     if result:
         if bool(args.statistics):
-            SolverStatistics().print_statistics()
-        if not solver_settings.json_format:
+            print_statistics(args)
+        if not solver_settings.json_format and not solver_settings.ndjson_format:
             print("ASPQ SAT")
         if problem_has_global_weak:
-            exit(30)
-        exit(10 if not solver.optimum_found else 30)
+            return 30
+        return 10 if not solver.optimum_found else 30
     else:
         if bool(args.statistics):
-            SolverStatistics().print_statistics()
-        if not solver_settings.json_format:
+            print_statistics(args)
+        if not solver_settings.json_format and not solver_settings.ndjson_format:
             print("ASPQ UNSAT")
-        exit(20)
\ No newline at end of file
+        return 20
+
+def print_statistics(args):
+    if bool(args.json):
+        SolverStatistics().print_statistics_json()
+    else:
+        SolverStatistics().print_statistics()
@@ -0,0 +1,145 @@
+# Copyright [2025] [Andrea Cuteri, Giuseppe Mazzotta and Francesco Ricca]
+
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+
+#        http://www.apache.org/licenses/LICENSE-2.0
+
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+import os
+import subprocess
+import sys
+
+import pytest
+
+from src.ASPQSolver import ASPQSolver
+from src.ProjectionIndex import ProjectionIndex
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TIMEOUT = 60
+
+#\forall-first programs whose candidates are refined through extensions of the refinement solver
+FORALL_FIRST_SAT = [
+    """%@forall
+{x0_0;x0_1;x0_2}.
+%@exists
+x1_0 :- not nx1_0. nx1_0 :- not x1_0.
+x1_1 :- not nx1_1, not x0_1. nx1_1 :- not x1_1.
+x1_2 :- not nx1_2. nx1_2 :- not x1_2.
+%@forall
+x2_0 :- not nx2_0. nx2_0 :- not x2_0.
+x2_1 :- not nx2_1. nx2_1 :- not x2_1.
+x2_2 :- not nx2_2, x1_0. nx2_2 :- not x2_2.
+%@exists
+x3_0 :- not nx3_0, not x0_0. nx3_0 :- not x3_0.
+x3_1 :- not nx3_1, not x0_2. nx3_1 :- not x3_1.
+x3_2 :- not nx3_2. nx3_2 :- not x3_2.
+%@constraint
+:- not x3_2, x1_2.
+:- not x3_1, not x1_0.
+""",
+    """%@forall
+{x0_0;x0_1;x0_2}.
+%@exists
+x1_0 :- not nx1_0. nx1_0 :- not x1_0.
+x1_1 :- not nx1_1. nx1_1 :- not x1_1.
+x1_2 :- not nx1_2, not x0_1. nx1_2 :- not x1_2.
+%@forall
+x2_0 :- not nx2_0, x1_2. nx2_0 :- not x2_0.
+x2_1 :- not nx2_1. nx2_1 :- not x2_1.
+%@exists
+x3_0 :- not nx3_0, not x0_2. nx3_0 :- not x3_0.
+x3_1 :- not nx3_1. nx3_1 :- not x3_1.
+x3_2 :- not nx3_2. nx3_2 :- not x3_2.
+%@constraint
+:- not x1_1, not x0_0, not x0_1.
+:- not x3_1, not x0_0.
+:- x0_0, x1_1, not x2_0.
+:- not x0_2, not x3_0, x0_1.
+:- not x2_0, x3_2.
+""",
+]
+
+#the quantified answer sets are the subsets of {x0_0, x0_1, x0_2} containing x0_0
+EXISTS_FIRST_ENUMERATION = """%@exists
+{x0_0;x0_1;x0_2}.
+%@forall
+x1_0 :- not nx1_0. nx1_0 :- not x1_0.
+x1_1 :- not nx1_1. nx1_1 :- not x1_1.
+%@exists
+x2_0 :- not nx2_0. nx2_0 :- not x2_0.
+x2_1 :- not nx2_1. nx2_1 :- not x2_1.
+x2_2 :- not nx2_2, x0_0. nx2_2 :- not x2_2.
+%@forall
+x3_0 :- not nx3_0. nx3_0 :- not x3_0.
+x3_1 :- not nx3_1. nx3_1 :- not x3_1.
+x3_2 :- not nx3_2. nx3_2 :- not x3_2.
+%@constraint
+:- not x0_0, not x0_2, not x2_1.
+:- not x2_2, not x0_2, not x3_2.
+:- x1_0, not x0_0.
+"""
+
+def run_casper(tmp_path, program, *arguments):
+    problem = tmp_path / "problem.lp"
+    problem.write_text(program)
+    return subprocess.run([sys.executable, "-c", "from src.app import entrypoint; entrypoint()", "--problem", str(problem), *arguments], cwd=ROOT, capture_output=True, text=True, timeout=TIMEOUT)
+
+@pytest.mark.parametrize("program", FORALL_FIRST_SAT)
+def test_forall_first_sat(tmp_path, program):
+    result = run_casper(tmp_path, program)
+    assert result.returncode == 10
+    assert "ASPQ SAT" in result.stdout
+
+def test_exists_first_enumeration(tmp_path):
+    result = run_casper(tmp_path, EXISTS_FIRST_ENUMERATION, "-n", "0")
+    assert result.returncode == 10
+    models = sorted(line for line in result.stdout.splitlines() if line.startswith("Model:"))
+    assert models == sorted(["Model:{x0_0. }", "Model:{x0_0. x0_1. }", "Model:{x0_0. x0_2. }", "Model:{x0_0. x0_1. x0_2. }"])
+
+class TrueModel:
+    def is_true(self, literal):
+        return True
+
+#atoms fixed to false by clingo have literal 0, which Model.is_true reports as true
+def test_fixed_false_atoms_are_false():
+    index = ProjectionIndex()
+    index.add("a", 2, True)
+    index.add("fail_1", 0, True)
+    index.set_model(TrueModel())
+    assert index.values == [True, False]
+    assert index.assumptions() == [("a", True), ("fail_1", False)]
+    assert index.blocking_nogood() == [2]
+    assert index.blocking_constraint() == ":-a."
+    assert index.output_literals() == [2]
+
+class SymbolicAtom:
+    def __init__(self, literal):
+        self.literal = literal
+
+class FalseLiteralSolver:
+    def false_literal(self, control):
+        return 7
+
+class Control:
+    def __init__(self, symbolic_atoms):
+        self.symbolic_atoms = symbolic_atoms
+
+#atoms with literal 0 in the control are handled like atoms removed from its domain
+def test_fixed_false_atoms_in_assumptions():
+    symbolic_atoms = {"a" : SymbolicAtom(2), "b" : SymbolicAtom(0), "c" : None}
+    assumptions = [("a", False), ("b", True), ("b", False), ("c", True), ("c", False)]
+    assert ASPQSolver.control_assumptions(FalseLiteralSolver(), Control(symbolic_atoms), assumptions) == [-2, 7, 7]
+
+    index = ProjectionIndex()
+    index.add("a", 1, True)
+    index.add("b", 2, True)
+    index.add("c", 3, True)
+    index.set_model(TrueModel())
+    index.resolve_countermove_literals(symbolic_atoms)
+    assert index.countermove_assumptions() == [2]
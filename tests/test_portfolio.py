@@ -0,0 +1,44 @@
+# Copyright [2025] [Andrea Cuteri, Giuseppe Mazzotta and Francesco Ricca]
+
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+
+#        http://www.apache.org/licenses/LICENSE-2.0
+
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+import argparse
+import time
+
+from src.Portfolio import Portfolio
+
+def arguments():
+    return argparse.Namespace(heuristic="", ground_transformation=True, ground_refinement=False, global_weak_lower_bound=False, n=1, portfolio=4)
+
+#the configuration given on the command line exits at once without an answer, the others answer later
+def exit_or_answer(encoding_program, instance_program, configuration):
+    if configuration.heuristic == "" and configuration.ground_transformation and not configuration.ground_refinement:
+        print("Could not configure clingo search")
+        exit(1)
+    time.sleep(0.5)
+    print("ASPQ UNSAT")
+    return 20
+
+def always_exit(encoding_program, instance_program, configuration):
+    print("Could not configure clingo search")
+    exit(1)
+
+def test_configurations_keep_global_weak_strategy():
+    portfolio = Portfolio(exit_or_answer, arguments(), 6)
+    assert len(portfolio.configurations) == 6
+    assert all(not configuration.global_weak_lower_bound for configuration in portfolio.configurations)
+
+def test_configuration_exiting_without_answer_does_not_win():
+    assert Portfolio(exit_or_answer, arguments(), 4).run("", "") == (20, "ASPQ UNSAT\n")
+
+def test_exit_reported_when_no_configuration_answers():
+    assert Portfolio(always_exit, arguments(), 2).run("", "") == (1, "Could not configure clingo search\n")
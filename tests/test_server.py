@@ -0,0 +1,42 @@
+# Copyright [2025] [Andrea Cuteri, Giuseppe Mazzotta and Francesco Ricca]
+
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+
+#        http://www.apache.org/licenses/LICENSE-2.0
+
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TIMEOUT = 60
+
+def run_server(requests):
+    input = "".join(json.dumps(request) + "\n" for request in requests)
+    process = subprocess.run([sys.executable, "-c", "from src.app import entrypoint; entrypoint()", "--server"], input=input, capture_output=True, text=True, cwd=ROOT, timeout=TIMEOUT)
+    return (process, [json.loads(line) for line in process.stdout.splitlines()])
+
+#encodings rejected while being prepared (prepare prints and exits) get an error response and the server keeps serving
+def test_rejected_encoding_keeps_server_running():
+    (process, responses) = run_server([
+        {"command" : "register", "encoding" : "%@exists\na :- fail_1.\n"},
+        {"command" : "register", "encoding" : "%@exists\n{a}.\n", "options" : {"n" : 0}},
+        {"command" : "solve", "id" : "0"},
+        {"command" : "shutdown"},
+    ])
+    assert process.returncode == 0
+    assert len(responses) == 4
+    assert "reserved" in responses[0]["error"]
+    assert "reserved" in process.stderr
+    assert responses[1] == {"id" : "0"}
+    assert responses[2]["result"] == "SAT"
+    assert responses[2]["output"].count("Model:") == 2
+    assert responses[3] == {}